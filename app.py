@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-import numpy as np
 import os
 import plotly.express as px
 import plotly.graph_objects as go
 
+from scripts.db import DB_PATH, connect
+from scripts.player_features import SNAPSHOT_PATH, Z_COLUMNS, data_version, load_dashboard_frame
+from scripts.player_search import SearchIndex
+from scripts.similarity_index import SimilarityIndex
+
 # --- CONFIGURATION ---
 st.set_page_config(
     page_title="GEM3 NCAA Scout",
@@ -13,62 +16,119 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics',
-                       'db', 'ncaa_d1_master.db')
-
 # --- DATA LOADING ---
 
 
-@st.cache_data
-def load_data():
+def data_key():
+    """
+    Changes whenever a load changes the profiles or 04 writes a new snapshot.
+    One single-row read and a stat, so it is checked on every rerun.
+    """
+    if not os.path.exists(DB_PATH):
+        return None
+    conn = connect(DB_PATH, readonly=True)
+    try:
+        source = data_version(conn)
+    finally:
+        conn.close()
+    mtime = os.path.getmtime(SNAPSHOT_PATH) if os.path.exists(SNAPSHOT_PATH) else None
+    return source, mtime
+
+
+# `key` (from data_key) only selects the cache entry: new data, new frame
+@st.cache_resource(max_entries=1)
+def load_data(key):
     if not os.path.exists(DB_PATH):
         st.error(f"Database not found at {DB_PATH}")
         return pd.DataFrame()
 
-    conn = sqlite3.connect(DB_PATH)
-    query = """
-    SELECT 
-        player_id, full_name, team_slug, team_name, conference, season, 
-        class_year, height, pos,
-        g, mp, pts, trb, ast, stl, blk, 
-        fg_pct, three_p_pct, ft_pct, ts_pct
-    FROM view_player_profiles 
-    WHERE g > 5
+    # Comparable player-seasons with z-scores, percentiles and a search column.
+    # Memory-mapped from the snapshot written by scripts/04_create_analytics_views.py
+    # (shared across server processes, never copied per session), or built from SQL.
+    conn = connect(DB_PATH, readonly=True)
+    try:
+        return load_dashboard_frame(conn)
+    finally:
+        conn.close()
+
+
+# Keyed on data_key() so neighbours follow a reload or a rebuild by 04;
+# bounded so entries of old keys age out
+@st.cache_data(max_entries=1000)
+def load_similar(player_id, key, limit=4):
+    """
+    Precomputed nearest neighbours (scripts/04_create_analytics_views.py),
+    nearest first. Raises DatabaseError until the table is built; errors are
+    not cached, so call similar_players().
     """
-    df = pd.read_sql(query, conn)
-    conn.close()
+    conn = connect(DB_PATH, readonly=True)
+    try:
+        return pd.read_sql(
+            """
+            SELECT v.player_id, v.full_name, v.team_slug, v.season, s.distance
+            FROM fact_player_similarity s
+            JOIN player_profiles v ON v.player_id = s.neighbor_id
+            WHERE s.player_id = ?
+            ORDER BY s.rank
+            LIMIT ?
+            """,
+            conn, params=(player_id, limit))
+    finally:
+        conn.close()
+
+
+def similar_players(player_id, key, limit=4):
+    """load_similar(), or an empty frame while the table isn't built yet."""
+    try:
+        return load_similar(player_id, key, limit)
+    except pd.errors.DatabaseError:
+        return pd.DataFrame()
 
-    # --- PRE-CALCULATIONS ---
-    features = ['pts', 'trb', 'ast', 'stl',
-                'blk', 'fg_pct', 'three_p_pct', 'ts_pct']
 
-    # 1. Normalize for Similarity (Z-Scores)
-    for f in features:
-        df[f] = pd.to_numeric(df[f], errors='coerce').fillna(0)
-        if df[f].std() != 0:
-            df[f'{f}_z'] = (df[f] - df[f].mean()) / df[f].std()
-        else:
-            df[f'{f}_z'] = 0
+@st.cache_resource(max_entries=1)
+def load_lookups(_df, key):
+    """
+    Row positions by player_id and by season, built once per data load.
+    The frame is shared by every session, so pages select rows through these
+    instead of filtering (and copying) the whole frame on each rerun.
+    """
+    row_of = {pid: i for i, pid in enumerate(_df['player_id'].tolist())}
+    season_rows = {season: rows for season, rows in _df.groupby('season').indices.items()}
+    return row_of, season_rows
+
 
-    # 2. Calculate Percentiles (0-100 scale)
-    for f in features:
-        df[f'{f}_pct_rank'] = df[f].rank(pct=True) * 100
+@st.cache_resource(max_entries=16)
+def load_season(_df, season, key):
+    """One season's rows; shared, so never modify it."""
+    return _df.iloc[load_lookups(_df, key)[1][season]]
 
-    # 3. Create a "Search Index" column for easier filtering
-    # This allows us to search "Duke Smith" and find matches
-    df['search_index'] = df['full_name'] + " " + \
-        df['team_name'] + " " + df['team_slug']
 
-    return df
+@st.cache_resource(max_entries=1)
+def load_search(_df, key):
+    """Prefix index over player names, team names and slugs, positions as in the frame."""
+    return SearchIndex(_df['full_name'].tolist(),
+                       zip(_df['team_name'].tolist(), _df['team_slug'].tolist()),
+                       _df['season'].to_numpy())
 
 
-df = load_data()
+@st.cache_resource(max_entries=1)
+def load_index(_df, key):
+    """k-NN index over the z-scores, rows in the same order as the cached frame."""
+    return SimilarityIndex(_df[Z_COLUMNS].to_numpy(), _df['player_id'].to_numpy(),
+                           _df['season'].to_numpy(), _df['pos'].to_numpy())
+
+
+# Shared by every session (cache_resource): read from it, never assign into it
+key = data_key()
+df = load_data(key)
 
 if df.empty:
     st.warning("No data found. Please run the scraper scripts first.")
     st.stop()
 
+row_of, season_rows = load_lookups(df, key)
+seasons = sorted(season_rows, reverse=True)
+
 # --- STATE MANAGEMENT (URL & DEEP LINKING) ---
 query_params = st.query_params
 default_pid = None
@@ -77,13 +137,10 @@ default_season_idx = 0
 if "player_id" in query_params:
     try:
         pid_param = int(query_params["player_id"])
-        player_record = df[df['player_id'] == pid_param]
-        if not player_record.empty:
+        if pid_param in row_of:
             default_pid = pid_param
-            target_season = player_record.iloc[0]['season']
-            seasons_list = sorted(df['season'].unique(), reverse=True)
-            if target_season in seasons_list:
-                default_season_idx = seasons_list.index(target_season)
+            target_season = df['season'].iat[row_of[pid_param]]
+            default_season_idx = seasons.index(target_season)
     except:
         pass
 
@@ -91,9 +148,8 @@ if "player_id" in query_params:
 st.sidebar.title("🏀 GEM3 Scout")
 
 # 1. Season Filter
-seasons = sorted(df['season'].unique(), reverse=True)
 sel_season = st.sidebar.selectbox("Season", seasons, index=default_season_idx)
-season_df = df[df['season'] == sel_season]
+season_df = load_season(df, sel_season, key)
 
 st.sidebar.divider()
 
@@ -107,10 +163,10 @@ search_query = st.sidebar.text_input(
 
 filtered_players = season_df
 if search_query:
-    # Case-insensitive search across Name and Team
-    # We use the pre-built 'search_index' column for speed
-    filtered_players = season_df[season_df['search_index'].str.contains(
-        search_query, case=False)]
+    # Every word must start a word of the name, team or slug ("duke smi");
+    # best matches first, at most SEARCH_LIMIT of them
+    rows = load_search(df, key).query(search_query, seasons=[sel_season])
+    filtered_players = df.iloc[rows]
 
 # 3. Results Dropdown (Autocomplete Style)
 # Map ID -> Display String
@@ -141,7 +197,7 @@ if not selected_player_id:
     st.stop()
 
 # --- MAIN PAGE ---
-target = df[df['player_id'] == selected_player_id].iloc[0]
+target = df.iloc[row_of[selected_player_id]]
 
 tab1, tab2, tab3 = st.tabs(
     ["👤 Player Profile", "📊 League Context", "📘 Glossary"])
@@ -211,19 +267,24 @@ with tab1:
     st.caption(
         f"Identifying historical players with similar statistical footprints to {target['full_name']}.")
 
-    # Calculate Distance
-    features_z = [f'{f}_z' for f in ['pts', 'trb', 'ast',
-                                     'stl', 'blk', 'fg_pct', 'three_p_pct', 'ts_pct']]
-    t_vec = target[features_z].values.astype(float)
-    all_vec = df[features_z].values.astype(float)
-
-    diff = all_vec - t_vec
-    dists = np.sqrt(np.sum(diff**2, axis=1))
-    df['distance'] = dists
-
-    # Get Top matches
-    matches = df[df['player_id'] != target['player_id']
-                 ].sort_values('distance').head(4)
+    f1, f2 = st.columns(2)
+    same_season = f1.checkbox("Same season only")
+    same_pos = f2.checkbox("Same position only", disabled=pd.isna(target['pos']))
+
+    # Unfiltered matches come straight from the precomputed table
+    matches = pd.DataFrame()
+    if not (same_season or same_pos):
+        matches = similar_players(int(target['player_id']), key)
+    if matches.empty:
+        # Filtered, or no similarity table yet: ask the k-NN index
+        index = load_index(df, key)
+        ids, dists = index.neighbors(
+            target['player_id'], 4,
+            seasons=[target['season']] if same_season else None,
+            positions=[target['pos']] if same_pos else None)
+        # Only the k matched rows are copied out of the shared frame
+        rows = [row_of[pid] for pid in ids.tolist()]
+        matches = df.iloc[rows][['player_id', 'full_name', 'team_slug', 'season']].assign(distance=dists)
 
     cols = st.columns(4)
     for i, (idx, row) in enumerate(matches.iterrows()):
@@ -1,20 +1,18 @@
-import requests
 from bs4 import BeautifulSoup
 import json
 import os
 import time
 
+from http_fetch import HEADERS, HttpCache, TokenBucket, fetch_with_retries
+from instrument import instrumented
+
 # CONFIG
 OUTPUT_FILE = 'configs/d1_teams_master.json'
 # CHANGED URL: Target the 2025 stats page (contains all active D1 teams)
 URL = "https://www.sports-reference.com/cbb/seasons/men/2025-school-stats.html"
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36',
-    'Accept-Language': 'en-US,en;q=0.9',
-}
-
 
+@instrumented('teams')
 def get_d1_slugs():
     print(f"Fetching D1 team list from {URL}...")
 
@@ -22,14 +20,25 @@ def get_d1_slugs():
         # Sleep briefly to cool down if you just ran the script
         time.sleep(2)
 
-        resp = requests.get(URL, headers=HEADERS)
+        # Conditional GET: if the page hasn't changed since the last run,
+        # the server answers 304 and the existing team list stays as is.
+        cache = HttpCache()
+        try:
+            resp = fetch_with_retries(URL, TokenBucket(10), headers=HEADERS, cache=cache,
+                                      conditional=os.path.exists(OUTPUT_FILE))
+        finally:
+            cache.close()
+
+        if resp.not_modified:
+            print(f"Team list unchanged since last fetch. Keeping {OUTPUT_FILE}")
+            return
 
-        if resp.status_code != 200:
+        if resp.status != 200:
             print(
-                f"Error: Failed to fetch page. Status Code: {resp.status_code}")
+                f"Error: Failed to fetch page. Status Code: {resp.status}")
             return
 
-        soup = BeautifulSoup(resp.content, 'html.parser')
+        soup = BeautifulSoup(resp.text, 'html.parser')
 
         # The ID for the stats table on this page is 'basic_school_stats'
         table = soup.find('table', {'id': 'basic_school_stats'})
@@ -1,14 +1,27 @@
+import argparse
 import os
 import time
 import json
-import requests
-import random
 from tqdm import tqdm
 
+from http_fetch import HttpCache, TokenBucket, fetch_many
+from instrument import instrumented
+from raw_store import RawStore
+from scrape_jobs import DONE, FAILED, PENDING, RETRY, ScrapeJobQueue
+
 # --- CONFIG ---
 TEST_MODE = False  # <--- Set to False for the full run
 YEARS = [2021, 2022, 2023, 2024, 2025]
 
+# VITAL: Rate limiting. One shared budget for all workers.
+# ~8 requests/min matches the old 6-10s sleep between requests.
+REQUESTS_PER_MINUTE = 8.0
+WORKERS = 4
+MAX_ATTEMPTS = 5
+
+# Point at a local replay server (scripts/replay_server.py) to test offline
+BASE_URL = "https://www.sports-reference.com"
+
 # --- ROBUST PATH SETUP ---
 # Get the location of this script
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -19,75 +32,238 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 TEAM_LIST_PATH = os.path.join(PROJECT_ROOT, 'configs', 'd1_teams_master.json')
 RAW_DIR = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'data_raw')
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36',
-    'Accept-Language': 'en-US,en;q=0.9',
-}
 
+def team_url(slug, year, base_url=BASE_URL):
+    return f"{base_url}/cbb/schools/{slug}/{year}.html"
+
+
+def write_page(filepath, text):
+    # Write to a temp file first so an interrupted run never leaves a
+    # truncated page that the "skip if downloaded" check would trust.
+    tmp_path = filepath + '.part'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, filepath)
 
-def scrape_season(year, teams):
-    year_dir = os.path.join(RAW_DIR, str(year))
-    os.makedirs(year_dir, exist_ok=True)
 
-    print(f"\n--- Scraping Season: {year} ---")
+def page_path(slug, year):
+    return os.path.join(RAW_DIR, str(year), f"{slug}_{year}.html")
+
+
+def enqueue_season(queue, year, teams, test_mode=TEST_MODE, refresh=False):
+    """
+    Queues every team page for `year`. Newer seasons get higher priority.
+    With refresh=True pages already fetched are queued again, and they go out
+    as conditional GETs so an unchanged page costs a 304.
+    """
+    os.makedirs(os.path.join(RAW_DIR, str(year)), exist_ok=True)
 
     # If in test mode, slice the list to just the first 3 teams
-    current_batch = teams[:3] if TEST_MODE else teams
+    current_batch = teams[:3] if test_mode else teams
+
+    # Jobs get a random shuffle key so the crawl order looks less like a bot
+    added = queue.enqueue(
+        [(team['slug'], year, team_url(team['slug'], year)) for team in current_batch],
+        priority=year,
+    )
+    requeued = queue.reset(year, (DONE,)) if refresh else 0
+    print(f"Season {year}: {added} new jobs queued, {requeued} re-queued for refresh.")
 
-    # Randomize order to behave less like a bot (only if full run)
-    if not TEST_MODE:
-        random.shuffle(current_batch)
 
-    # Use tqdm for a nice progress bar
-    for team in tqdm(current_batch):
-        slug = team['slug']
-        filename = f"{slug}_{year}.html"
-        filepath = os.path.join(year_dir, filename)
+def drain_queue(queue, seasons, limiter, workers=WORKERS, cache=None, refresh=False,
+                max_attempts=MAX_ATTEMPTS, store=None, base_url=BASE_URL):
+    """
+    Fetches queued pages until nothing is left for `seasons`, recording each
+    outcome as it arrives. Failed fetches come back after their backoff.
+    With a RawStore pages are saved there (compressed, deduplicated by
+    content) instead of as plain files.
+    """
+    remaining = sum(n for _, status, n in queue.summary(seasons) if status in (PENDING, RETRY))
+    pbar = tqdm(total=remaining)
+    start = time.perf_counter()
+    saved = 0
+    unchanged = 0
+    requests_sent = 0
 
-        # Skip if already downloaded
-        if os.path.exists(filepath):
+    while True:
+        claimed = queue.claim(seasons, limit=workers * 8)
+        if not claimed:
+            wait = queue.next_eligible_in(seasons)
+            if wait is None:
+                break
+            print(f"\nWaiting {wait:.0f}s for queued retries to become eligible...")
+            time.sleep(wait)
             continue
 
-        url = f"https://www.sports-reference.com/cbb/schools/{slug}/{year}.html"
+        jobs = []
+        for slug, year, _, attempts in claimed:
+            url = team_url(slug, year, base_url)
+            filepath = page_path(slug, year)
+            exists = store.has(slug, year) if store is not None else os.path.exists(filepath)
+            if exists and not refresh:
+                # Downloaded before this job was queued
+                queue.mark_done(slug, year)
+                pbar.update(1)
+                continue
+            jobs.append((slug, year, url, attempts, filepath, exists))
 
-        try:
-            # VITAL: Rate limiting.
-            # Sleep 3.5 to 4.5 seconds (~15 requests/min) to stay safe.
-            time.sleep(random.uniform(6.0, 10.0))
+        results = fetch_many(
+            jobs,
+            lambda job: job[2],
+            limiter,
+            workers,
+            max_attempts=1,  # the queue owns retries
+            cache=cache,
+            conditional_for=lambda job: job[5],
+        )
 
-            resp = requests.get(url, headers=HEADERS)
+        # Pages are written here as they arrive while the workers keep fetching
+        for result in results:
+            slug, year, _, attempts, filepath, _ = result.job
+            requests_sent += 1
 
-            if resp.status_code == 200:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(resp.text)
-            elif resp.status_code == 404:
-                # Team might not have existed or played D1 that year
-                pass
-            elif resp.status_code == 429:
-                print(f"\nHIT RATE LIMIT (429). Sleeping for 2 minutes...")
-                time.sleep(120)
-            else:
-                print(f"Error {resp.status_code} for {slug}")
+            if result.not_modified:
+                unchanged += 1
+            elif result.status == 200 and store is not None:
+                if store.put(slug, year, result.text):
+                    saved += 1
+                else:
+                    unchanged += 1
+            elif result.status == 200:
+                write_page(filepath, result.text)
+                saved += 1
 
-        except Exception as e:
-            print(f"Failed {slug}: {e}")
+            status = queue.record(slug, year, attempts + 1, result.status, result.error,
+                                  max_attempts, result.retry_after)
+            if status == FAILED:
+                reason = result.error or f"HTTP {result.status}"
+                print(f"\nGiving up on {slug} {year} after {attempts + 1} attempts ({reason})")
+            if status != RETRY:
+                pbar.update(1)
 
+    pbar.close()
+    elapsed = time.perf_counter() - start
+    print(f"Saved {saved} pages ({unchanged} unchanged) from {requests_sent} requests in "
+          f"{elapsed:.0f}s ({requests_sent / max(elapsed, 1e-9) * 60:.1f} requests/min)")
+
+
+def print_queue_status(queue, seasons):
+    print("\n--- Scrape Queue ---")
+    for season, status, count in queue.summary(seasons):
+        print(f"  {season}  {status:<8} {count}")
+    failures = queue.failures(seasons)
+    if failures:
+        print(f"\n{len(failures)} failed jobs (rerun with --retry-failed):")
+        for slug, season, attempts, http_code, error in failures:
+            print(f"  {slug} {season}: {attempts} attempts, last HTTP {http_code} {error or ''}")
+
+
+@instrumented('scrape')
+def main():
+    parser = argparse.ArgumentParser(
+        description="Download Sports-Reference team-season pages for all D1 teams."
+    )
+    parser.add_argument(
+        "--season",
+        type=int,
+        action="append",
+        help="Season year to scrape, e.g. 2025. Repeatable. If omitted, scrapes all seasons.",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=REQUESTS_PER_MINUTE,
+        help="Request budget in requests/minute, shared by all workers.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS,
+        help="Number of concurrent fetch threads.",
+    )
+    parser.add_argument(
+        "--test",
+        action="store_true",
+        default=TEST_MODE,
+        help="Only scrape the first 3 teams.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Refetch pages already on disk with conditional GETs (unchanged pages return 304).",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=MAX_ATTEMPTS,
+        help="Attempts per page before it is marked failed.",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Give pages that previously failed another round of attempts.",
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Print the scrape queue summary and failed pages, then exit.",
+    )
+    parser.add_argument(
+        "--raw-store",
+        action="store_true",
+        help="Save pages to the compressed, content-addressed raw store instead of plain files.",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=BASE_URL,
+        help="Site to fetch from, e.g. a local replay server for benchmarks.",
+    )
+    args = parser.parse_args()
+    seasons = args.season or YEARS
+
+    queue = ScrapeJobQueue()
+    if args.status:
+        print_queue_status(queue, seasons)
+        queue.close()
+        return
 
-if __name__ == "__main__":
     print(f"Looking for config at: {TEAM_LIST_PATH}")
 
     if not os.path.exists(TEAM_LIST_PATH):
         print(f"Error: Config file not found at {TEAM_LIST_PATH}")
         print("Did you run script 00_fetch_team_slugs.py?")
+        queue.close()
+        return
+
+    with open(TEAM_LIST_PATH, 'r') as f:
+        d1_teams = json.load(f)
+
+    print(f"Loaded {len(d1_teams)} teams.")
+    if args.test:
+        print("!!! RUNNING IN TEST MODE (First 3 teams only) !!!")
     else:
-        with open(TEAM_LIST_PATH, 'r') as f:
-            d1_teams = json.load(f)
+        print("!!! RUNNING FULL SCRAPE (This will take hours) !!!")
+    print(f"Rate limit: {args.rpm:.1f} requests/min across {args.workers} workers.")
+
+    # Jobs live in a durable queue, so an interrupted run picks up where it stopped
+    for year in seasons:
+        enqueue_season(queue, year, d1_teams, args.test, args.refresh)
+        if args.retry_failed:
+            queue.reset(year, (FAILED,))
 
-        print(f"Loaded {len(d1_teams)} teams.")
-        if TEST_MODE:
-            print("!!! RUNNING IN TEST MODE (First 3 teams only) !!!")
-        else:
-            print("!!! RUNNING FULL SCRAPE (This will take hours) !!!")
+    limiter = TokenBucket(args.rpm)
+    cache = HttpCache()
+    store = RawStore() if args.raw_store else None
+    try:
+        drain_queue(queue, seasons, limiter, args.workers, cache, args.refresh,
+                    args.max_attempts, store, args.base_url.rstrip('/'))
+        print_queue_status(queue, seasons)
+    finally:
+        cache.close()
+        queue.close()
+        if store is not None:
+            store.close()
 
-        for year in YEARS:
-            scrape_season(year, d1_teams)
+
+if __name__ == "__main__":
+    main()
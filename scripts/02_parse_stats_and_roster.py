@@ -1,8 +1,19 @@
+import argparse
+import hashlib
+import json
 import os
 import pandas as pd
 import glob
 from io import StringIO
 import re
+import time
+import lxml.html
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from instrument import instrumented, span
+from intermediate_format import FORMATS, write_intermediate
+from raw_store import RawStore, read_raw_html
 
 # --- PATHS ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,6 +23,20 @@ INTER_DIR = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'data_intermediate')
 
 YEARS = [2021, 2022, 2023, 2024, 2025]
 
+# Sports-Reference table ids, in order of preference.
+# Newer team pages use 'players_per_game', older ones 'per_game'.
+PER_GAME_TABLE_IDS = ['players_per_game', 'per_game']
+ROSTER_TABLE_IDS = ['roster']
+
+# Bump whenever parse_team_file() output changes so cached parses are redone.
+PARSER_VERSION = 1
+MANIFEST_NAME = 'parse_manifest.json'
+CACHE_DIRNAME = '.parse_cache'
+
+# One raw page to parse: a plain data_raw/<year>/<slug>_<year>.html file
+# (sha256=None) or a blob from the raw store (sha256 = its content hash).
+RawSource = namedtuple('RawSource', ['name', 'path', 'slug', 'sha256'])
+
 
 def clean_html(html_content):
     """
@@ -33,85 +58,358 @@ def find_per_game_table(tables):
     return None
 
 
-def parse_html_for_year(year):
-    year_path = os.path.join(RAW_DIR, str(year))
-    print(f"\n--- Processing Year: {year} ---")
+def find_table_html(doc, comments, table_ids):
+    """
+    Returns the markup of the first table matching `table_ids`, or None.
+    SR hides some tables inside HTML comments, so those are searched too.
+    """
+    for table_id in table_ids:
+        found = doc.xpath(f'//table[@id="{table_id}"]')
+        if found:
+            return lxml.html.tostring(found[0], encoding='unicode')
+
+        marker = f'id="{table_id}"'
+        for comment in comments:
+            if marker in comment:
+                fragment = lxml.html.fragment_fromstring(
+                    comment, create_parent='div')
+                found = fragment.xpath(f'.//table[@id="{table_id}"]')
+                if found:
+                    return lxml.html.tostring(found[0], encoding='unicode')
+    return None
+
+
+def extract_tables(raw_html):
+    """
+    Fast path: locate the per-game and roster tables by id with lxml and
+    parse only those two. Returns (df_stats, df_roster); either may be None.
+    """
+    doc = lxml.html.fromstring(raw_html)
+    comments = [c.text for c in doc.xpath('//comment()') if c.text and '<table' in c.text]
+
+    def read_table(table_ids):
+        table_html = find_table_html(doc, comments, table_ids)
+        if table_html is None:
+            return None
+        return pd.read_html(StringIO(table_html))[0]
 
+    return read_table(PER_GAME_TABLE_IDS), read_table(ROSTER_TABLE_IDS)
+
+
+def extract_tables_legacy(raw_html):
+    """
+    Slow path: read every table on the page and pick the per-game and roster
+    tables by column heuristics. Used when the table ids are not present.
+    """
+    # Strip comments to see hidden tables
+    html_content = clean_html(raw_html)
+
+    try:
+        # Read ALL tables from the HTML
+        tables = pd.read_html(StringIO(html_content))
+    except ValueError:
+        return None, None
+
+    df_stats = find_per_game_table(tables)
+
+    # Look for 'Player' and 'Class' or 'Pos'
+    df_roster = None
+    for df in tables:
+        cols = [str(c).lower() for c in df.columns]
+        if "player" in cols and ("class" in cols or "pos" in cols or "hgt" in cols):
+            df_roster = df
+            break
+
+    return df_stats, df_roster
+
+
+def parse_team_file(filepath, year, team_slug=None):
+    """
+    Parses one team-season page into (df_stats, df_roster) tagged with
+    team_slug and season. Either frame may be None if its table is missing.
+    `filepath` may be a plain .html file or a compressed raw-store blob.
+    """
+    if team_slug is None:
+        team_slug = os.path.basename(filepath).split('_')[0]
+
+    raw_html = read_raw_html(filepath)
+
+    df_stats, df_roster = extract_tables(raw_html)
+    if df_stats is None or df_roster is None:
+        legacy_stats, legacy_roster = extract_tables_legacy(raw_html)
+        if df_stats is None:
+            df_stats = legacy_stats
+        if df_roster is None:
+            df_roster = legacy_roster
+
+    if df_stats is not None:
+        # Clean up standard SR footer rows (Team Totals, etc)
+        df_stats = df_stats[df_stats['Player'].notna()]
+        bad_labels = {"Team", "Team Totals", "Opponents", "Opponent"}
+        df_stats = df_stats[~df_stats["Player"].isin(bad_labels)]
+
+        # Add Metadata
+        df_stats.insert(0, 'team_slug', team_slug)
+        df_stats.insert(1, 'season', year)
+
+    if df_roster is not None:
+        df_roster.insert(0, 'team_slug', team_slug)
+        df_roster.insert(1, 'season', year)
+
+    return df_stats, df_roster
+
+
+def list_year_sources(year, store=None):
+    """
+    Raw pages for a season as RawSources sorted by name (so output order is
+    stable), or None if there are none. Reads the raw store when given.
+    """
+    if store is not None:
+        pages = store.latest(year)
+        if not pages:
+            return None
+        return sorted(RawSource(f"{slug}_{year}.html", path, slug, sha256)
+                      for slug, sha256, path in pages)
+
+    year_path = os.path.join(RAW_DIR, str(year))
     if not os.path.exists(year_path):
-        print(f"No data found for {year}")
-        return
+        return None
+    return [RawSource(os.path.basename(path), path, os.path.basename(path).split('_')[0], None)
+            for path in sorted(glob.glob(os.path.join(year_path, "*.html")))]
 
-    html_files = glob.glob(os.path.join(year_path, "*.html"))
 
-    all_stats = []
-    all_rosters = []
+def file_fingerprint(filepath):
+    st = os.stat(filepath)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
 
-    for filepath in html_files:
-        file_name = os.path.basename(filepath)
-        team_slug = file_name.split('_')[0]
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            raw_html = f.read()
-            # 1. Strip comments to see hidden tables
-            html_content = clean_html(raw_html)
+def file_sha1(filepath):
+    h = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
 
-        try:
-            # Read ALL tables from the HTML
-            tables = pd.read_html(StringIO(html_content))
-        except ValueError:
-            print(f"  No tables found in {file_name}")
-            continue
 
-        # --- 1. Find Stats Table (Heuristic Approach) ---
-        df_stats = find_per_game_table(tables)
+def load_manifest(year):
+    path = os.path.join(INTER_DIR, str(year), MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
 
-        if df_stats is not None:
-            # Clean up standard SR footer rows (Team Totals, etc)
-            df_stats = df_stats[df_stats['Player'].notna()]
-            bad_labels = {"Team", "Team Totals", "Opponents", "Opponent"}
-            df_stats = df_stats[~df_stats["Player"].isin(bad_labels)]
 
-            # Add Metadata
-            df_stats.insert(0, 'team_slug', team_slug)
-            df_stats.insert(1, 'season', year)
+def save_manifest(year, manifest):
+    out_dir = os.path.join(INTER_DIR, str(year))
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def cache_path(year, name):
+    name = os.path.splitext(os.path.basename(name))[0] + '.pkl'
+    return os.path.join(INTER_DIR, str(year), CACHE_DIRNAME, name)
+
+
+def manifest_entry(source):
+    if source.sha256 is not None:
+        return {'sha256': source.sha256, 'parser_version': PARSER_VERSION}
+    return {
+        **file_fingerprint(source.path),
+        'sha1': file_sha1(source.path),
+        'parser_version': PARSER_VERSION,
+    }
+
+
+def is_cached(entry, source, year):
+    """
+    True if the manifest entry still describes `source` and its cached parse
+    exists. Raw-store blobs compare their content hash directly. For plain
+    files size+mtime is checked first, and the content hash only when they
+    moved (e.g. a re-scrape that wrote the same page); the entry is then
+    refreshed in place.
+    """
+    if not entry or entry.get('parser_version') != PARSER_VERSION:
+        return False
+    if not os.path.exists(cache_path(year, source.name)):
+        return False
+    if source.sha256 is not None:
+        return entry.get('sha256') == source.sha256
+    if 'sha1' not in entry:
+        return False
+
+    filepath = source.path
+    fingerprint = file_fingerprint(filepath)
+    if entry['size'] == fingerprint['size'] and entry['mtime_ns'] == fingerprint['mtime_ns']:
+        return True
+    if entry['size'] == fingerprint['size'] and entry['sha1'] == file_sha1(filepath):
+        entry.update(fingerprint)
+        return True
+    return False
 
+
+def collect_results(sources, results):
+    """Splits per-file (df_stats, df_roster) results into stats and roster lists."""
+    all_stats = []
+    all_rosters = []
+
+    for source, (df_stats, df_roster) in zip(sources, results):
+        if df_stats is not None:
             all_stats.append(df_stats)
         else:
-            print(f"  Warning: No 'Per Game' table found for {team_slug}")
-
-        # --- 2. Find Roster Table (Heuristic Approach) ---
-        # Look for 'Player' and 'Class' or 'Pos'
-        df_roster = None
-        for df in tables:
-            cols = [str(c).lower() for c in df.columns]
-            if "player" in cols and ("class" in cols or "pos" in cols or "hgt" in cols):
-                df_roster = df
-                break
+            print(f"  Warning: No 'Per Game' table found for {source.slug}")
 
         if df_roster is not None:
-            df_roster.insert(0, 'team_slug', team_slug)
-            df_roster.insert(1, 'season', year)
             all_rosters.append(df_roster)
 
-    # --- SAVE CSVs ---
-    out_dir = os.path.join(INTER_DIR, str(year))
-    os.makedirs(out_dir, exist_ok=True)
+    return all_stats, all_rosters
+
 
-    if all_stats:
-        master_stats = pd.concat(all_stats, ignore_index=True)
-        outfile = os.path.join(out_dir, f'per_game_all_d1_{year}.csv')
-        master_stats.to_csv(outfile, index=False)
-        print(f"SUCCESS: Saved {len(master_stats)} stat rows to {outfile}")
-    else:
+def save_year(year, all_stats, all_rosters, fmt='csv'):
+    """Writes the season's stats and roster files. Returns the number of stat rows."""
+    if not all_stats:
         print(f"FAILURE: No stats found for {year}.")
+        return 0
+
+    master_stats = pd.concat(all_stats, ignore_index=True)
+    outfile = write_intermediate(master_stats, year, 'per_game', fmt)
+    print(f"SUCCESS: Saved {len(master_stats)} stat rows to {outfile}")
 
     if all_rosters:
         master_roster = pd.concat(all_rosters, ignore_index=True)
-        outfile = os.path.join(out_dir, f'rosters_all_d1_{year}.csv')
-        master_roster.to_csv(outfile, index=False)
+        outfile = write_intermediate(master_roster, year, 'rosters', fmt)
         print(f"SUCCESS: Saved {len(master_roster)} roster rows to {outfile}")
+    return len(master_stats)
+
+
+def parse_years(years, workers=1, full=False, fmt='csv', store=None):
+    """
+    Parses raw team-season pages into per-year CSVs.
+
+    Each season keeps a manifest (size, mtime, sha1 or blob hash, parser
+    version) and a pickled parse per page, so only new or changed pages are
+    parsed; the CSVs are then rebuilt from the cached pieces. full=True
+    ignores the cache. With a RawStore the pages are read from its blobs
+    instead of data_raw/<year>.
+
+    With workers > 1 the pages to parse (across all seasons, not per season)
+    are spread over a process pool. Results come back in submission order and
+    pages are sorted, so the CSVs match a serial run.
+
+    fmt='parquet' writes typed Parquet in the fixed schema from
+    intermediate_format instead of raw-header CSVs.
+    """
+    plans = []
+    jobs = []
+    for year in years:
+        sources = list_year_sources(year, store)
+        if sources is None:
+            print(f"No data found for {year}")
+            continue
+
+        manifest = {} if full else load_manifest(year)
+        stale = [src for src in sources
+                 if not is_cached(manifest.get(src.name), src, year)]
+        print(f"{year}: {len(sources)} files, {len(stale)} to parse, "
+              f"{len(sources) - len(stale)} cached")
+
+        plans.append((year, sources, manifest))
+        jobs.extend((src, year) for src in stale)
+
+    start = time.perf_counter()
+    paths = [src.path for src, _ in jobs]
+    job_years = [year for _, year in jobs]
+    slugs = [src.slug for src, _ in jobs]
+    with span('parse.pages', f"{workers} workers") as s:
+        s.rows_in = len(jobs)
+        if workers > 1 and len(jobs) > 1:
+            chunksize = max(1, len(jobs) // (workers * 8))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(parse_team_file, paths, job_years, slugs, chunksize=chunksize))
+        else:
+            results = [parse_team_file(*args) for args in zip(paths, job_years, slugs)]
+        s.rows_out = sum(df_stats is not None for df_stats, _ in results)
+    elapsed = time.perf_counter() - start
+    if jobs:
+        print(f"  Parsed {len(jobs)} files in {elapsed:.2f}s ({workers} workers)")
+
+    parsed = {(year, src.name): result for (src, year), result in zip(jobs, results)}
+
+    for year, sources, manifest in plans:
+        with span('parse.year', year) as s:
+            print(f"\n--- Processing Year: {year} ---")
+            os.makedirs(os.path.join(INTER_DIR, str(year), CACHE_DIRNAME), exist_ok=True)
+
+            year_results = []
+            for src in sources:
+                if (year, src.name) in parsed:
+                    result = parsed[(year, src.name)]
+                    pd.to_pickle(result, cache_path(year, src.name))
+                    manifest[src.name] = manifest_entry(src)
+                else:
+                    result = pd.read_pickle(cache_path(year, src.name))
+                year_results.append(result)
+
+            # Forget pages that disappeared from the raw data
+            current = {src.name for src in sources}
+            for name in set(manifest) - current:
+                del manifest[name]
+                stale_cache = cache_path(year, name)
+                if os.path.exists(stale_cache):
+                    os.remove(stale_cache)
+
+            s.rows_in = len(sources)
+            s.rows_out = save_year(year, *collect_results(sources, year_results), fmt)
+            save_manifest(year, manifest)
+
+
+def parse_html_for_year(year, workers=1, full=False, fmt='csv', store=None):
+    parse_years([year], workers, full, fmt, store)
+
+
+@instrumented('parse')
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parse raw team-season HTML into per-year stats and roster CSVs."
+    )
+    parser.add_argument(
+        "--season",
+        type=int,
+        action="append",
+        help="Season year to parse, e.g. 2025. Repeatable. If omitted, parses all seasons.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of parser processes. 1 parses serially; 0 uses one per CPU.",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the parse manifest and re-parse every file.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="csv",
+        help="Intermediate file format. parquet writes typed, normalized columns (needs pyarrow).",
+    )
+    parser.add_argument(
+        "--raw-store",
+        action="store_true",
+        help="Read pages from the compressed raw store instead of data_raw/<year>/*.html.",
+    )
+    args = parser.parse_args()
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    store = RawStore() if args.raw_store else None
+    try:
+        parse_years(args.season or YEARS, workers, args.full, args.format, store)
+    finally:
+        if store is not None:
+            store.close()
 
 
 if __name__ == "__main__":
-    for year in YEARS:
-        parse_html_for_year(year)
+    main()
@@ -1,18 +1,26 @@
+import argparse
 import pandas as pd
-import sqlite3
 import os
 import json
+import time
+
+from db import DB_PATH, connect, migrate
+from instrument import instrumented, span
+from intermediate_format import find_intermediate, read_intermediate
+from player_profiles import init_profile_schema, refresh_profiles
 
 # --- PATHS ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
-DB_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics',
-                       'db', 'ncaa_d1_master.db')
-INTER_DIR = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'data_intermediate')
 CONFIG_PATH = os.path.join(PROJECT_ROOT, 'configs', 'd1_teams_master.json')
 
 YEARS = [2021, 2022, 2023, 2024, 2025]
 
+# Only these intermediate columns are read (normalized names, see intermediate_format)
+STATS_COLUMNS = ['team_slug', 'player', 'g', 'gs', 'mp', 'pts', 'trb', 'ast', 'stl', 'blk',
+                 'fga', 'fg_pct', 'three_p_pct', 'fta', 'ft_pct']
+ROSTER_COLUMNS = ['team_slug', 'player', 'class_year', 'height', 'weight', 'pos']
+
 
 def init_schema(conn):
     """Creates the Normalized Tables (Teams, Players, Stats) matching reference style."""
@@ -66,15 +74,77 @@ def init_schema(conn):
         three_p_pct REAL,
         ft_pct REAL,
         ts_pct REAL,
-        FOREIGN KEY (player_id) REFERENCES players(player_id)
+        FOREIGN KEY (player_id) REFERENCES players(player_id),
+        UNIQUE (player_id, season)
     );
     """)
+
     conn.commit()
 
+    # Secondary indexes and the legacy stats key wait for these tables on a fresh DB
+    migrate(conn)
+
+    # 4. Materialized profiles (player_profiles), refreshed per season below
+    init_profile_schema(conn)
+
+
+def load_team_map(conn):
+    """Returns {team_slug: team_id} for every team in the DB."""
+    return dict(conn.execute("SELECT team_slug, team_id FROM teams").fetchall())
+
+
+def to_records(df, cols):
+    """
+    Rows of `cols` as plain Python tuples ready for executemany.
+    Missing columns become NULL, as do NaNs.
+    """
+    out = df.reindex(columns=cols).astype(object)
+    out = out.where(out.notna(), None)
+    return list(out.itertuples(index=False, name=None))
+
+
+def enrich_with_roster(df_stats, df_roster):
+    """
+    Left-joins roster info (class_year/height/weight/pos) onto the stat rows
+    on (team_slug, player). If a player is listed twice on a roster, the
+    first listing wins.
+    """
+    keys = ['team_slug', 'player']
+    roster_cols = [c for c in ROSTER_COLUMNS if c not in keys]
+
+    if df_roster.empty:
+        roster = pd.DataFrame(columns=ROSTER_COLUMNS)
+    else:
+        roster = df_roster.drop_duplicates(subset=keys)[ROSTER_COLUMNS]
+
+    merged = df_stats.merge(roster, on=keys, how='left', indicator='_roster_match')
+    merged.index = df_stats.index
+
+    unmatched = merged[merged['_roster_match'] == 'left_only']
+    if not unmatched.empty:
+        sample = ", ".join(
+            f"{r.player} ({r.team_slug})" for r in unmatched.head(5).itertuples())
+        print(f"  {len(unmatched)} players not found on a roster (e.g. {sample})")
+
+    merged = merged.drop(columns='_roster_match')
+    return merged.reindex(columns=list(df_stats.columns) + roster_cols)
 
-def load_data():
+
+def load_data(years=YEARS, mode='upsert', fmt='auto'):
+    """
+    Loads the intermediate files for `years` into the DB. fmt picks CSV or
+    Parquet; 'auto' uses whichever was written last.
+
+    Re-running is idempotent: players are keyed on (full_name, team_id, season)
+    and stats on (player_id, season). mode='upsert' updates matching rows in
+    place; mode='replace' first clears the season's stat rows, so the stat rows
+    of players that dropped out of the source data are removed too. The players
+    rows and their ids are kept in both modes because global ids and bio rows
+    hang off them. Each season's player_profiles rows are rebuilt in the same
+    transaction.
+    """
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     init_schema(conn)
 
     # 1. Load Teams from Config
@@ -90,91 +160,125 @@ def load_data():
         conn.commit()
 
     # 2. Load Stats & Rosters by Year
-    for year in YEARS:
-        stats_path = os.path.join(INTER_DIR, str(
-            year), f'per_game_all_d1_{year}.csv')
-        roster_path = os.path.join(INTER_DIR, str(
-            year), f'rosters_all_d1_{year}.csv')
+    for year in years:
+        stats_path = find_intermediate(year, 'per_game', fmt)
+        roster_path = find_intermediate(year, 'rosters', fmt)
 
-        if not os.path.exists(stats_path):
+        if stats_path is None:
             print(f"Skipping {year} (No data)")
             continue
 
-        print(f"Processing {year}...")
-        df_stats = pd.read_csv(stats_path)
+        with span('load.season', year) as s:
+            print(f"Processing {year} from {os.path.basename(stats_path)}...")
+            df_stats = read_intermediate(stats_path, 'per_game', STATS_COLUMNS)
 
-        # Clean Column Names
-        df_stats.columns = [c.replace('%', '_pct').replace(
-            '3', 'three_').replace('2', 'two_') for c in df_stats.columns]
+            # Load Roster if available for enrichment
+            df_roster = pd.DataFrame()
+            if roster_path is not None:
+                df_roster = read_intermediate(roster_path, 'rosters', ROSTER_COLUMNS)
+            s.rows_in = len(df_stats)
 
-        # Load Roster if available for enrichment
-        df_roster = pd.DataFrame()
-        if os.path.exists(roster_path):
-            df_roster = pd.read_csv(roster_path)
+            start = time.perf_counter()
 
-        cur = conn.cursor()
+            # Resolve team ids with one in-memory map instead of a SELECT per row
+            team_map = load_team_map(conn)
+            df_stats['team_id'] = df_stats['team_slug'].map(team_map)
+            df_stats = df_stats[df_stats['team_id'].notna()].copy()  # Skip teams not in DB
+            df_stats['team_id'] = df_stats['team_id'].astype(int)
+
+            # Attach roster info with one keyed join
+            df_stats = enrich_with_roster(df_stats, df_roster)
+            df_stats['season'] = year
 
-        # --- INSERT PLAYERS AND STATS ---
-        # This mimics the reference logic: Join stats to teams, then insert players
-
-        for _, row in df_stats.iterrows():
-            slug = row['team_slug']
-            name = row['Player']
-
-            # Get Team ID
-            cur.execute(
-                "SELECT team_id FROM teams WHERE team_slug = ?", (slug,))
-            res = cur.fetchone()
-            if not res:
-                continue  # Skip if team not in DB
-            team_id = res[0]
-
-            # Try to find roster info for this player
-            r_info = df_roster[(df_roster['team_slug'] == slug) & (
-                df_roster['Player'] == name)] if not df_roster.empty else pd.DataFrame()
-
-            cls = r_info['Class'].values[0] if not r_info.empty and 'Class' in r_info else None
-            ht = r_info['Ht'].values[0] if not r_info.empty and 'Ht' in r_info else None
-            wt = r_info['Wt'].values[0] if not r_info.empty and 'Wt' in r_info else None
-            pos = r_info['Pos'].values[0] if not r_info.empty and 'Pos' in r_info else None
-
-            # Insert Player (Or Ignore if exists)
-            cur.execute("""
-                INSERT OR IGNORE INTO players (full_name, team_id, season, class_year, height, weight, pos)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (name, team_id, year, cls, ht, wt, pos))
-
-            # Get Player ID
-            cur.execute(
-                "SELECT player_id FROM players WHERE full_name = ? AND team_id = ? AND season = ?", (name, team_id, year))
-            pid = cur.fetchone()[0]
-
-            # Insert Stats
             # Calculate TS% (Points / (2 * (FGA + 0.44 * FTA)))
-            pts = row.get('PTS', 0)
-            fga = row.get('FGA', 0)
-            fta = row.get('FTA', 0)
-            ts_pct = 0
-            if (fga + 0.44 * fta) > 0:
-                ts_pct = pts / (2 * (fga + 0.44 * fta))
-
-            cur.execute("""
-                INSERT INTO fact_player_stats (player_id, season, g, gs, mp, pts, trb, ast, stl, blk, fg_pct, three_p_pct, ft_pct, ts_pct)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                pid, year, row.get('G'), row.get('GS'), row.get('MP'),
-                pts, row.get('TRB'), row.get(
-                    'AST'), row.get('STL'), row.get('BLK'),
-                row.get('FG_pct'), row.get(
-                    'three_P_pct'), row.get('FT_pct'), ts_pct
-            ))
+            ts_denom = df_stats['fga'] + 0.44 * df_stats['fta']
+            df_stats['ts_pct'] = (df_stats['pts'] / (2 * ts_denom)).where(ts_denom > 0, 0)
 
-        conn.commit()
-        print(f"  Loaded {year} complete.")
+            # --- INSERT PLAYERS AND STATS ---
+            # The whole season goes in as one transaction using executemany
+            with conn:
+                if mode == 'replace':
+                    cur = conn.execute(
+                        "DELETE FROM fact_player_stats WHERE season = ?", (year,))
+                    print(f"  Cleared {cur.rowcount} existing stat rows for {year}.")
+
+                conn.executemany("""
+                    INSERT INTO players (full_name, team_id, season, class_year, height, weight, pos)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (full_name, team_id, season) DO UPDATE SET
+                        class_year = excluded.class_year,
+                        height = excluded.height,
+                        weight = excluded.weight,
+                        pos = excluded.pos
+                """, to_records(df_stats, ['player', 'team_id', 'season', 'class_year', 'height', 'weight', 'pos']))
+
+                # Get Player IDs for the whole season in one query
+                player_map = {
+                    (name, team_id): pid for name, team_id, pid in conn.execute(
+                        "SELECT full_name, team_id, player_id FROM players WHERE season = ?", (year,))
+                }
+                df_stats['player_id'] = [
+                    player_map[key] for key in zip(df_stats['player'], df_stats['team_id'])]
+
+                conn.executemany("""
+                    INSERT INTO fact_player_stats (player_id, season, g, gs, mp, pts, trb, ast, stl, blk, fg_pct, three_p_pct, ft_pct, ts_pct)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (player_id, season) DO UPDATE SET
+                        g = excluded.g,
+                        gs = excluded.gs,
+                        mp = excluded.mp,
+                        pts = excluded.pts,
+                        trb = excluded.trb,
+                        ast = excluded.ast,
+                        stl = excluded.stl,
+                        blk = excluded.blk,
+                        fg_pct = excluded.fg_pct,
+                        three_p_pct = excluded.three_p_pct,
+                        ft_pct = excluded.ft_pct,
+                        ts_pct = excluded.ts_pct
+                """, to_records(df_stats, [
+                    'player_id', 'season', 'g', 'gs', 'mp', 'pts', 'trb', 'ast', 'stl', 'blk',
+                    'fg_pct', 'three_p_pct', 'ft_pct', 'ts_pct']))
+
+                profiles = refresh_profiles(conn, [year])
+
+            s.rows_out = len(df_stats)
+            elapsed = time.perf_counter() - start
+            print(f"  Loaded {year} complete: {len(df_stats)} rows in {elapsed:.2f}s "
+                  f"({len(df_stats) / max(elapsed, 1e-9):,.0f} rows/sec, "
+                  f"{profiles} profile rows changed).")
 
     conn.close()
     print("Database Load Complete.")
 
 
+@instrumented('load')
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load parsed per-game stats and rosters into the master SQLite DB."
+    )
+    parser.add_argument(
+        "--season",
+        type=int,
+        action="append",
+        help="Season year to (re)load, e.g. 2025. Repeatable. If omitted, loads all seasons.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["upsert", "replace"],
+        default="upsert",
+        help="upsert: update existing rows in place. replace: clear each season's stat rows first.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["auto", "csv", "parquet"],
+        default="auto",
+        help="Intermediate format to read. auto uses whichever file was written last.",
+    )
+    args = parser.parse_args()
+
+    load_data(args.season or YEARS, args.mode, args.format)
+
+
 if __name__ == "__main__":
-    load_data()
+    main()
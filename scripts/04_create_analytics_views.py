@@ -1,115 +1,165 @@
+import argparse
+import time
 import pandas as pd
-from sqlalchemy import create_engine, text
 import numpy as np
 import os
 
+from db import DB_PATH, connect
+from instrument import current_span, instrumented, span
+from player_features import (MIN_GAMES, SNAPSHOT_PATH, Z_COLUMNS, build_feature_store,
+                             dashboard_frame, data_version, pa, write_snapshot)
+from player_profiles import VIEW_COLUMNS, init_profile_schema, refresh_profiles, stale_seasons
+from similarity_index import SimilarityIndex
+
 # --- PATH CONFIGURATION ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
-DB_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics',
-                       'db', 'ncaa_d1_master.db')
-# Handle Windows paths for SQLite
-DB_CONNECTION_STR = f'sqlite:///{DB_PATH}'
+
+# --- SIMILARITY CONFIG ---
+TOP_K = 10
 
 
+@instrumented('analytics.views')
 def create_views():
-    engine = create_engine(DB_CONNECTION_STR)
-
-    print("Creating Views...")
-    with engine.connect() as con:
-        # 1. Create a Master View that joins Teams, Players, and Stats
-        # This makes querying easy (like a flat Excel sheet)
-        con.execute(text("DROP VIEW IF EXISTS view_player_profiles;"))
-
-        sql_view = """
-        CREATE VIEW view_player_profiles AS
-        SELECT 
-            p.player_id,
-            p.full_name,
-            t.team_slug,
-            t.team_name,
-            t.conference,
-            p.season,
-            p.class_year,
-            p.height,
-            p.weight,
-            p.pos,
-            s.g,
-            s.gs,
-            s.mp,
-            s.pts,
-            s.trb,
-            s.ast,
-            s.stl,
-            s.blk,
-            s.fg_pct,
-            s.three_p_pct,
-            s.ft_pct,
-            s.ts_pct
-        FROM fact_player_stats s
-        JOIN players p ON s.player_id = p.player_id
-        JOIN teams t ON p.team_id = t.team_id;
-        """
-        con.execute(text(sql_view))
-        print("View 'view_player_profiles' created successfully.")
+    """
+    Brings the materialized player_profiles table up to date (the loader
+    refreshes seasons as it loads them; this catches DBs loaded before the
+    table existed and rows that drifted since) and keeps view_player_profiles
+    as an alias of it with the old view's columns.
+    """
+    conn = connect(DB_PATH)
+    try:
+        with conn:
+            init_profile_schema(conn)
+            seasons = stale_seasons(conn)
+            rows = refresh_profiles(conn, seasons)
+            # Old name kept for ad-hoc queries; it no longer re-runs the join
+            conn.execute("DROP VIEW IF EXISTS view_player_profiles;")
+            conn.execute(f"CREATE VIEW view_player_profiles AS "
+                         f"SELECT {', '.join(VIEW_COLUMNS)} FROM player_profiles;")
+    finally:
+        conn.close()
+
+    if seasons:
+        print(f"Refreshed player_profiles for {seasons} ({rows} rows).")
+    else:
+        print("player_profiles is up to date.")
+
+
+@instrumented('analytics.similarity')
+def build_similarity_table(k=TOP_K):
+    """
+    Persists the normalized feature matrix (player_features), then computes
+    the k nearest neighbours of every player-season once and stores them in
+    fact_player_similarity (player_id, rank, neighbor_id, distance).
+    """
+    print(f"\n--- Building Similarity Table (top {k}) ---")
+    conn = connect(DB_PATH)
+    try:
+        start = time.perf_counter()
+        features = build_feature_store(conn)
+        if len(features) < 2:
+            print("Not enough players to compare.")
+            return
+        features_s = time.perf_counter() - start
+        current_span().rows_in = len(features)
+
+        ids = features['player_id'].to_numpy()
+        index = SimilarityIndex(features[Z_COLUMNS].to_numpy(), ids)
+        neighbors, distances = index.knn_all(k)
+        k = neighbors.shape[1]
+        compute_s = time.perf_counter() - start - features_s
+
+        table = pd.DataFrame({
+            'player_id': np.repeat(ids, k),
+            'rank': np.tile(np.arange(1, k + 1), len(ids)),
+            'neighbor_id': ids[neighbors.ravel()],
+            'distance': distances.ravel(),
+        })
+
+        with conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS fact_player_similarity (
+                player_id INTEGER NOT NULL,
+                rank INTEGER NOT NULL,
+                neighbor_id INTEGER NOT NULL,
+                distance REAL NOT NULL,
+                PRIMARY KEY (player_id, rank)
+            ) WITHOUT ROWID;
+            """)
+            # Z-scores are global, so any data change can move every neighbour
+            conn.execute("DELETE FROM fact_player_similarity;")
+            conn.executemany(
+                "INSERT INTO fact_player_similarity (player_id, rank, neighbor_id, distance) VALUES (?, ?, ?, ?);",
+                table.itertuples(index=False, name=None),
+            )
+        current_span().rows_out = len(table)
+    finally:
+        conn.close()
+
+    print(f"Stored {len(ids)} feature rows and {len(table)} neighbours "
+          f"(features {features_s:.2f}s, neighbours {compute_s:.2f}s, "
+          f"total {time.perf_counter() - start:.2f}s).")
+
+
+@instrumented('analytics.snapshot')
+def build_dashboard_snapshot():
+    """Writes the dashboard's frame to the memory-mapped snapshot app.py starts from."""
+    if pa is None:
+        print("\npyarrow not installed; skipping dashboard snapshot.")
+        return
+    start = time.perf_counter()
+    conn = connect(DB_PATH)
+    try:
+        df = dashboard_frame(conn)
+        size = write_snapshot(df, data_version(conn))
+        current_span().rows_out = len(df)
+    finally:
+        conn.close()
+    print(f"\nWrote {len(df)} rows to {os.path.relpath(SNAPSHOT_PATH, PROJECT_ROOT)} "
+          f"({size / 1e6:.1f} MB, {time.perf_counter() - start:.2f}s).")
 
 
 def run_similarity_search(target_season=2025):
-    print(f"\n--- Computing Similarity for {target_season} ---")
-    engine = create_engine(DB_CONNECTION_STR)
+    print(f"\n--- Similar Players for {target_season} ---")
+    conn = connect(DB_PATH, readonly=True)
+    try:
+        print_similar_players(conn, target_season)
+    finally:
+        conn.close()
 
-    # Load data using the View we just made
+
+def print_similar_players(conn, target_season):
+    # Top scorers of the season, and their stored neighbours
     try:
-        df = pd.read_sql(
-            f"SELECT * FROM view_player_profiles WHERE g > 0", engine)
-        if df.empty:
-            print("No stats found in DB.")
-            return
+        top_scorers = pd.read_sql(
+            """
+            SELECT * FROM player_profiles
+            WHERE season = :season AND g >= :min_games
+            ORDER BY pts DESC LIMIT 5
+            """,
+            conn, params={'season': target_season, 'min_games': MIN_GAMES})
     except Exception as e:
         print(f"Database Error: {e}")
         return
 
-    # 1. Select Features for Similarity
-    features = ['pts', 'trb', 'ast', 'stl',
-                'blk', 'fg_pct', 'three_p_pct', 'ts_pct']
-
-    # 2. Normalize Data (Z-Score) across the ENTIRE dataset (all years)
-    # This lets us compare a 2025 player to a 2021 player
-    for f in features:
-        df[f] = pd.to_numeric(df[f], errors='coerce').fillna(0)
-        if df[f].std() != 0:
-            df[f'{f}_z'] = (df[f] - df[f].mean()) / df[f].std()
-        else:
-            df[f'{f}_z'] = 0
-
-    # 3. Filter for current target players (e.g., 2025 roster)
-    current_players = df[df['season'] == target_season].copy()
-
-    if current_players.empty:
+    if top_scorers.empty:
         print(
             f"No players found for season {target_season}. (Did you run the parser?)")
         return
 
-    print(
-        f"Analyzing {len(current_players)} players from {target_season} against {len(df)} historical records...")
-
-    # 4. Find Similar Players (Example: Top 5 Scorers)
-    top_scorers = current_players.sort_values('pts', ascending=False).head(5)
-
-    for idx, target in top_scorers.iterrows():
-        # Calculate Euclidean Distance
-        dist_sq = 0
-        for f in features:
-            dist_sq += (df[f'{f}_z'] - target[f'{f}_z']) ** 2
-
-        # Calculate distance for ALL players in DB
-        df['distance'] = np.sqrt(dist_sq)
+    match_sql = """
+    SELECT v.*, s.distance
+    FROM fact_player_similarity s
+    JOIN player_profiles v ON v.player_id = s.neighbor_id
+    WHERE s.player_id = :player_id
+    ORDER BY s.rank
+    LIMIT 3
+    """
 
-        # Find top 3 matches (excluding the player themselves)
+    for _, target in top_scorers.iterrows():
         # We allow matches from previous years (historical comps)
-        matches = df[
-            (df['player_id'] != target['player_id'])  # Don't match self
-        ].sort_values('distance').head(3)
+        matches = pd.read_sql(match_sql, conn, params={'player_id': int(target['player_id'])})
 
         print(f"\nPLAYER: {target['full_name']} ({target['team_slug']})")
         print(
@@ -123,5 +173,25 @@ def run_similarity_search(target_season=2025):
 
 
 if __name__ == "__main__":
-    create_views()
-    run_similarity_search(2025)
+    parser = argparse.ArgumentParser(
+        description="Create analytics views, precompute similar players and print examples."
+    )
+    parser.add_argument(
+        "--season",
+        type=int,
+        default=2025,
+        help="Season to print example matches for.",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=TOP_K,
+        help="Neighbours stored per player-season.",
+    )
+    args = parser.parse_args()
+
+    with span('analytics'):
+        create_views()
+        build_similarity_table(args.top_k)
+        build_dashboard_snapshot()
+        run_similarity_search(args.season)
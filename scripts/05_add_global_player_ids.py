@@ -3,6 +3,9 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from db import DB_PATH, connect, migrate
+from instrument import instrumented
+
 # We try these in order and use the first one that exists.
 CANDIDATE_PLAYER_TABLES = ["players", "dim_players", "dim_player"]
 
@@ -59,13 +62,14 @@ def add_global_player_id(conn: sqlite3.Connection, table_name: str, id_col: str)
     print("[INFO] Done setting global_player_id.")
 
 
+@instrumented('global_ids')
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Add and populate global_player_id column for player table."
     )
     parser.add_argument(
         "--db-path",
-        default="ncaa-analytics/db/ncaa.sqlite",
+        default=DB_PATH,
         help="Path to local NCAA SQLite database.",
     )
     args = parser.parse_args()
@@ -78,7 +82,7 @@ def main() -> None:
         print("        Run the main NCAA pipeline to build the DB first.")
         sys.exit(1)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
         table_name = find_player_table(conn)
         if not table_name:
@@ -95,6 +99,10 @@ def main() -> None:
             sys.exit(1)
 
         add_global_player_id(conn, table_name, id_col)
+        # Now that the column exists, its index migration can run
+        applied = migrate(conn)
+        if applied:
+            print(f"[INFO] Applied migrations: {', '.join(applied)}")
     finally:
         conn.close()
 
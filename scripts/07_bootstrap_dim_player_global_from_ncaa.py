@@ -3,6 +3,9 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from db import DB_PATH, connect
+from instrument import instrumented
+
 
 def table_exists(conn: sqlite3.Connection, name: str) -> bool:
     cur = conn.cursor()
@@ -13,13 +16,14 @@ def table_exists(conn: sqlite3.Connection, name: str) -> bool:
     return cur.fetchone() is not None
 
 
+@instrumented('global_players')
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Bootstrap dim_player_global from NCAA players table."
     )
     parser.add_argument(
         "--db-path",
-        default="ncaa-analytics/db/ncaa_d1_master.db",
+        default=DB_PATH,
         help="Path to SQLite DB.",
     )
     args = parser.parse_args()
@@ -31,7 +35,7 @@ def main() -> None:
         print(f"[ERROR] DB not found at: {db_path}")
         sys.exit(1)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
         if not table_exists(conn, "players"):
             print("[ERROR] Expected `players` table not found.")
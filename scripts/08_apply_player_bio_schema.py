@@ -1,16 +1,19 @@
 import argparse
-import sqlite3
 import sys
 from pathlib import Path
 
+from db import DB_PATH, connect
+from instrument import instrumented
 
+
+@instrumented('bio_schema')
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Apply player bio schema SQL file to the NCAA SQLite database."
     )
     parser.add_argument(
         "--db-path",
-        default="ncaa-analytics/db/ncaa_d1_master.db",
+        default=DB_PATH,
         help="Path to SQLite DB.",
     )
     parser.add_argument(
@@ -35,7 +38,7 @@ def main() -> None:
 
     sql = schema_path.read_text(encoding="utf-8")
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
         conn.executescript(sql)
         conn.commit()
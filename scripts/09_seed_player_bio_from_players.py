@@ -3,6 +3,9 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from db import DB_PATH, connect
+from instrument import current_span, instrumented
+
 
 def table_exists(conn: sqlite3.Connection, name: str) -> bool:
     cur = conn.cursor()
@@ -13,13 +16,14 @@ def table_exists(conn: sqlite3.Connection, name: str) -> bool:
     return cur.fetchone() is not None
 
 
+@instrumented('seed_bio')
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Seed dim_player_bio from NCAA players table."
     )
     parser.add_argument(
         "--db-path",
-        default="ncaa-analytics/db/ncaa_d1_master.db",
+        default=DB_PATH,
         help="Path to SQLite DB.",
     )
     args = parser.parse_args()
@@ -31,7 +35,7 @@ def main() -> None:
         print(f"[ERROR] DB not found at: {db_path}")
         sys.exit(1)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
         if not table_exists(conn, "players"):
             print("[ERROR] Expected `players` table not found.")
@@ -49,9 +53,8 @@ def main() -> None:
         cur = conn.cursor()
         print("[INFO] Inserting/refreshing bio rows from players ...")
 
-        # Simple refresh: clear and reinsert from players snapshot
-        cur.execute("DELETE FROM dim_player_bio;")
-
+        # Incremental refresh: only new or changed rows are written, and
+        # fields this table owns (birthdate, hometown, ...) are kept
         cur.execute(
             """
             INSERT INTO dim_player_bio (
@@ -71,12 +74,37 @@ def main() -> None:
                 p.pos
             FROM players p
             WHERE p.global_player_id IS NOT NULL
-              AND p.global_player_id != '';
+              AND p.global_player_id != ''
+            ON CONFLICT(global_player_id) DO UPDATE SET
+                full_name = excluded.full_name,
+                class_year = excluded.class_year,
+                height = excluded.height,
+                weight = excluded.weight,
+                primary_position = excluded.primary_position,
+                updated_at = datetime('now')
+            WHERE dim_player_bio.full_name IS NOT excluded.full_name
+               OR dim_player_bio.class_year IS NOT excluded.class_year
+               OR dim_player_bio.height IS NOT excluded.height
+               OR dim_player_bio.weight IS NOT excluded.weight
+               OR dim_player_bio.primary_position IS NOT excluded.primary_position;
+            """
+        )
+        changed = cur.rowcount
+
+        # Players that no longer exist
+        cur.execute(
+            """
+            DELETE FROM dim_player_bio
+            WHERE global_player_id NOT IN (
+                SELECT global_player_id FROM players
+                WHERE global_player_id IS NOT NULL
+            );
             """
         )
+        removed = cur.rowcount
         conn.commit()
-        inserted = cur.rowcount
-        print(f"[INFO] Inserted {inserted} rows into dim_player_bio.")
+        current_span().rows_out = changed + removed
+        print(f"[INFO] Inserted or updated {changed} rows in dim_player_bio, removed {removed}.")
     finally:
         conn.close()
 
@@ -5,6 +5,9 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from db import DB_PATH, connect
+from instrument import instrumented
+
 
 def check_players_table(conn: sqlite3.Connection) -> None:
     cur = conn.cursor()
@@ -41,13 +44,14 @@ def load_nba_csv(nba_csv_path: Path) -> int:
     return len(rows)
 
 
+@instrumented('link_nba')
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Prototype NCAA ↔ NBA player linker (no writes yet)."
     )
     parser.add_argument(
         "--db-path",
-        default="ncaa-analytics/db/ncaa.sqlite",
+        default=DB_PATH,
         help="Path to local NCAA SQLite database.",
     )
     parser.add_argument(
@@ -68,7 +72,7 @@ def main() -> None:
         print("        Run the NCAA pipeline scripts first to build the DB.")
         sys.exit(1)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
         check_players_table(conn)
     finally:
@@ -1,21 +1,44 @@
 import argparse
+import glob
+import os
 import sqlite3
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
+from urllib.parse import urlencode
 
-import requests
+import lxml.html
 from bs4 import BeautifulSoup
+from lxml import etree
+from tqdm import tqdm
 
+from db import DB_PATH, connect
+from dob_cache import DobCache
+from http_fetch import TokenBucket, fetch_with_retries
+from instrument import instrumented
+from raw_store import RawStore, read_raw_html
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+RAW_DIR = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'data_raw')
 
 BASE_URL = "https://www.sports-reference.com"
-SEARCH_URL = f"{BASE_URL}/cbb/search/search.fcgi"
+SEARCH_PATH = "/cbb/search/search.fcgi"
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; gem3-ncaa-db/0.1; +https://github.com/itprodirect)",
 }
 
+# One shared request budget across all workers
+REQUESTS_PER_MINUTE = 20.0
+WORKERS = 4
+MAX_ATTEMPTS = 3
+BATCH_SIZE = 200
+
 
 def table_exists(conn: sqlite3.Connection, name: str) -> bool:
     cur = conn.cursor()
@@ -36,26 +59,13 @@ def get_latest_season(conn: sqlite3.Connection) -> int:
     return int(row[0])
 
 
-def search_player_url(name: str) -> Optional[str]:
-    """Search Sports-Reference for a player and return the first /cbb/players/*.html URL."""
-    try:
-        resp = requests.get(
-            SEARCH_URL,
-            params={"search": name},
-            headers=HEADERS,
-            timeout=10,
-        )
-        resp.raise_for_status()
-    except Exception as e:
-        print(f"[WARN] Search request failed for '{name}': {e}")
-        return None
-
-    # If Sports-Reference redirects straight to a player page, use that.
-    if resp.url.startswith(f"{BASE_URL}/cbb/players/") and resp.url.endswith(".html"):
-        print(f"[INFO] Direct player page for '{name}': {resp.url}")
-        return resp.url
+def parse_search_result(html: str, final_url: Optional[str], base_url: str = BASE_URL) -> Optional[str]:
+    """First /cbb/players/*.html URL for a search response, or None if there is no match."""
+    # If Sports-Reference redirected straight to a player page, use that.
+    if final_url and final_url.startswith(f"{base_url}/cbb/players/") and final_url.endswith(".html"):
+        return final_url
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     # Try to find a player link in the search results table first.
     link = None
@@ -70,47 +80,145 @@ def search_player_url(name: str) -> Optional[str]:
             break
 
     if not link or not link.get("href"):
-        print(f"[WARN] No specific player link found for '{name}'. "
-              f"Search page URL: {resp.url}")
         return None
 
     href = link["href"]
     if not href.startswith("/"):
         href = "/" + href
-    url = BASE_URL + href
-    print(f"[INFO] Search match for '{name}': {url}")
-    return url
+    return base_url + href
 
 
-def fetch_birthdate(player_url: str) -> Optional[str]:
-    """Fetch player page and extract birthdate in YYYY-MM-DD from data-birth attr."""
-    try:
-        resp = requests.get(player_url, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-    except Exception as e:
-        print(f"[WARN] Failed to fetch player page {player_url}: {e}")
-        return None
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-
+def parse_birthdate(html: str) -> Optional[str]:
+    """Birthdate in YYYY-MM-DD from the data-birth attr of a player page, or None."""
+    soup = BeautifulSoup(html, "html.parser")
     span = soup.find("span", attrs={"itemprop": "birthDate"})
     if span:
         data_birth = span.get("data-birth")
         if data_birth:
-            print(f"[INFO] Parsed birthdate {data_birth} from {player_url}")
             return data_birth.strip()
-
-    print(f"[WARN] Could not find structured birthdate on page: {player_url}")
     return None
 
 
+def harvest_player_links(html: str) -> dict:
+    """
+    {player name: /cbb/players/*.html path} from a team-season page. Looks
+    inside HTML comments too, where Sports-Reference hides some tables.
+    Names linked to more than one page map to None (ambiguous).
+    """
+    doc = lxml.html.fromstring(html)
+    fragments = [doc]
+    for comment in doc.iter(etree.Comment):
+        if comment.text and '/cbb/players/' in comment.text:
+            fragments.append(lxml.html.fromstring(comment.text))
+
+    links = {}
+    for fragment in fragments:
+        for a in fragment.xpath('.//a[starts-with(@href, "/cbb/players/")]'):
+            name = a.text_content().strip()
+            href = a.get('href')
+            if name and href.endswith('.html'):
+                links[name] = href if links.get(name, href) == href else None
+    return links
+
+
+def harvest_season(season: int, raw_dir: str, store: Optional[RawStore] = None) -> dict:
+    """{(team_slug, player name): player page path} from every raw team page of `season`."""
+    if store is not None:
+        pages = [(slug, path) for slug, _, path in store.latest(season)]
+    else:
+        pages = [(os.path.basename(path).split('_')[0], path)
+                 for path in sorted(glob.glob(os.path.join(raw_dir, str(season), '*.html')))]
+
+    links = {}
+    for slug, path in pages:
+        for name, href in harvest_player_links(read_raw_html(path)).items():
+            if href:
+                links[(slug, name)] = href
+    print(f"[INFO] Harvested {len(links)} player links from {len(pages)} team pages.")
+    return links
+
+
+@dataclass
+class DobLookup:
+    full_name: str
+    global_player_ids: List[str]
+    player_url: Optional[str] = None
+    birthdate: Optional[str] = None
+    searched: bool = False  # got a definitive search answer this run
+    fetched: bool = False   # got a definitive player page answer this run
+    requests: int = 0
+    error: Optional[str] = None
+
+
+def _fetch(lookup: DobLookup, url: str, limiter: TokenBucket, max_attempts: int):
+    result = fetch_with_retries(url, limiter, max_attempts, headers=HEADERS, timeout=10)
+    lookup.requests += result.attempts
+    if result.status not in (200, 404):
+        lookup.error = result.error or f"HTTP {result.status} for {url}"
+        return None
+    return result
+
+
+def resolve_player(lookup: DobLookup, limiter: TokenBucket, base_url: str = BASE_URL,
+                   max_attempts: int = MAX_ATTEMPTS) -> DobLookup:
+    """
+    Searches for the player (unless the URL is already known) and reads the
+    birthdate off the player page. Runs on a worker thread; the caller
+    records the outcome.
+    """
+    if lookup.player_url is None:
+        url = f"{base_url}{SEARCH_PATH}?{urlencode({'search': lookup.full_name})}"
+        result = _fetch(lookup, url, limiter, max_attempts)
+        if result is None:
+            return lookup
+        lookup.searched = True
+        if result.status == 404:
+            return lookup
+        lookup.player_url = parse_search_result(result.text, result.final_url, base_url)
+        if lookup.player_url is None:
+            return lookup
+        if lookup.player_url == result.final_url:
+            # Redirected to the player page itself; no second request needed
+            lookup.birthdate = parse_birthdate(result.text)
+            lookup.fetched = True
+            return lookup
+
+    result = _fetch(lookup, lookup.player_url, limiter, max_attempts)
+    if result is None:
+        return lookup
+    lookup.fetched = True
+    if result.status == 200:
+        lookup.birthdate = parse_birthdate(result.text)
+    return lookup
+
+
+def flush(conn: sqlite3.Connection, cache: DobCache, updates, searches, pages) -> int:
+    """Writes cached answers and birthdate updates in one batch each. Returns rows updated."""
+    cache.store(searches, pages)
+    with conn:
+        conn.executemany(
+            """
+            UPDATE dim_player_bio
+            SET birthdate = ?, updated_at = datetime('now')
+            WHERE global_player_id = ?;
+            """,
+            updates,
+        )
+    count = len(updates)
+    updates.clear()
+    searches.clear()
+    pages.clear()
+    return count
+
+
+@instrumented('dobs')
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Scrape player DOBs from Sports-Reference and update dim_player_bio.birthdate."
     )
     parser.add_argument(
         "--db-path",
-        default="ncaa-analytics/db/ncaa_d1_master.db",
+        default=DB_PATH,
         help="Path to SQLite DB.",
     )
     parser.add_argument(
@@ -122,14 +230,62 @@ def main() -> None:
     parser.add_argument(
         "--limit",
         type=int,
-        default=25,
-        help="Max number of players to process in this run.",
+        default=None,
+        help="Max number of players to process in this run. If omitted, processes all.",
     )
     parser.add_argument(
-        "--sleep",
+        "--rpm",
         type=float,
-        default=2.0,
-        help="Seconds to sleep between player requests (rate limiting).",
+        default=REQUESTS_PER_MINUTE,
+        help="Request budget in requests/minute, shared by all workers.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS,
+        help="Number of concurrent lookup threads.",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=MAX_ATTEMPTS,
+        help="Attempts per request on 429/5xx/network errors.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Write cache entries and DOB updates every N answers.",
+    )
+    parser.add_argument(
+        "--retry-misses",
+        action="store_true",
+        help="Look up players again whose search or page previously came back empty.",
+    )
+    parser.add_argument(
+        "--from-team-pages",
+        action="store_true",
+        help="Take player page links from the raw team pages instead of searching by name.",
+    )
+    parser.add_argument(
+        "--no-search",
+        action="store_true",
+        help="With --from-team-pages, skip players without a link instead of searching for them.",
+    )
+    parser.add_argument(
+        "--raw-dir",
+        default=RAW_DIR,
+        help="Directory with the <season>/*.html team pages for --from-team-pages.",
+    )
+    parser.add_argument(
+        "--raw-store",
+        action="store_true",
+        help="With --from-team-pages, read team pages from the compressed raw store.",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=BASE_URL,
+        help="Site to fetch from, e.g. a local replay server for benchmarks.",
     )
     args = parser.parse_args()
 
@@ -138,7 +294,8 @@ def main() -> None:
         print(f"[ERROR] DB not found at: {db_path}")
         sys.exit(1)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
+    cache = DobCache()
     try:
         if not table_exists(conn, "players"):
             print("[ERROR] Expected `players` table not found.")
@@ -159,16 +316,19 @@ def main() -> None:
             """
             SELECT DISTINCT
                 pb.global_player_id,
-                pb.full_name
+                pb.full_name,
+                t.team_slug
             FROM dim_player_bio pb
             JOIN players p
               ON p.global_player_id = pb.global_player_id
+            JOIN teams t
+              ON t.team_id = p.team_id
             WHERE p.season = ?
               AND (pb.birthdate IS NULL OR pb.birthdate = '')
             ORDER BY pb.full_name
             LIMIT ?;
             """,
-            (season, args.limit),
+            (season, args.limit if args.limit is not None else -1),
         )
         rows = cur.fetchall()
 
@@ -180,38 +340,88 @@ def main() -> None:
         print(
             f"[INFO] Found {len(rows)} players with missing DOB for season {season}.")
 
-        updated = 0
-        for idx, (global_player_id, full_name) in enumerate(rows, start=1):
-            print(
-                f"\n[PLAYER {idx}/{len(rows)}] {full_name} ({global_player_id})")
-
-            player_url = search_player_url(full_name)
-            if not player_url:
-                continue
-
-            dob = fetch_birthdate(player_url)
-            if not dob:
+        base_url = args.base_url.rstrip("/")
+
+        # Player page links on the team pages match on team + name, so no
+        # search (and no guessing between players who share a name)
+        harvested = {}
+        if args.from_team_pages:
+            store = RawStore() if args.raw_store else None
+            try:
+                harvested = harvest_season(season, args.raw_dir, store)
+            finally:
+                if store is not None:
+                    store.close()
+
+        # One lookup per distinct (name, page); answers already in the cache need no request
+        groups = {}
+        unlinked = set()
+        for global_player_id, full_name, team_slug in rows:
+            href = harvested.get((team_slug, full_name))
+            if href is None and args.from_team_pages and args.no_search:
+                unlinked.add(global_player_id)
                 continue
-
-            cur.execute(
-                """
-                UPDATE dim_player_bio
-                SET birthdate = ?, updated_at = datetime('now')
-                WHERE global_player_id = ?;
-                """,
-                (dob, global_player_id),
-            )
-            conn.commit()
-            updated += 1
-
-            print(
-                f"[INFO] Updated {full_name} ({global_player_id}) with DOB {dob}.")
-            if args.sleep > 0:
-                time.sleep(args.sleep)
-
+            url = base_url + href if href else None
+            groups.setdefault((full_name, url), set()).add(global_player_id)
+        known_urls = cache.urls_for(name for name, url in groups if url is None)
+        known_dobs = cache.birthdates_for(
+            [url for url in known_urls.values() if url] + [url for _, url in groups if url])
+
+        updates, searches, pages = [], [], []
+        lookups = []
+        skipped = 0
+        for (full_name, linked_url), ids in groups.items():
+            url = linked_url or known_urls.get(full_name)
+            dob = known_dobs.get(url)
+            if dob:
+                updates.extend((dob, gid) for gid in ids)
+            elif not args.retry_misses and (
+                    (linked_url is None and full_name in known_urls and url is None)
+                    or url in known_dobs):
+                skipped += len(ids)
+            else:
+                lookups.append(DobLookup(full_name, sorted(ids), url))
+        searches_needed = sum(1 for lookup in lookups if lookup.player_url is None)
+        print(f"[INFO] {len(updates)} DOBs from cache, {skipped} known misses skipped, "
+              f"{len(unlinked)} players without a team-page link skipped, "
+              f"{len(lookups)} lookups ({searches_needed} need a search).")
+
+        limiter = TokenBucket(args.rpm)
+        updated = 0
+        requests_sent = 0
+        errors = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(resolve_player, lookup, limiter, base_url, args.max_attempts)
+                       for lookup in lookups]
+            try:
+                for future in tqdm(as_completed(futures), total=len(futures)):
+                    lookup = future.result()
+                    requests_sent += lookup.requests
+                    if lookup.searched:
+                        searches.append((lookup.full_name, lookup.player_url))
+                    if lookup.fetched:
+                        pages.append((lookup.player_url, lookup.birthdate))
+                    if lookup.birthdate:
+                        updates.extend((lookup.birthdate, gid) for gid in lookup.global_player_ids)
+                    elif lookup.error:
+                        errors += 1
+                        print(f"\n[WARN] {lookup.full_name}: {lookup.error}")
+                    if len(searches) + len(pages) + len(updates) >= args.batch_size:
+                        updated += flush(conn, cache, updates, searches, pages)
+            except KeyboardInterrupt:
+                for future in futures:
+                    future.cancel()
+                raise
+            finally:
+                updated += flush(conn, cache, updates, searches, pages)
+
+        elapsed = time.perf_counter() - start
         print(
-            f"\n[RESULT] Updated {updated} players with DOBs for season {season}.")
+            f"\n[RESULT] Updated {updated} players with DOBs for season {season} "
+            f"({requests_sent} requests in {elapsed:.0f}s, {errors} lookups failed and will be retried next run).")
     finally:
+        cache.close()
         conn.close()
 
 
@@ -6,6 +6,9 @@ from datetime import date
 from statistics import mean, pstdev
 from typing import Optional, List
 
+from db import DB_PATH, connect
+from instrument import instrumented, span
+
 
 def table_exists(conn: sqlite3.Connection, name: str) -> bool:
     cur = conn.cursor()
@@ -62,13 +65,14 @@ def compute_age(birthdate_str: str, season: int) -> Optional[float]:
     return days / 365.25
 
 
+@instrumented('ages')
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Compute age features by season into fact_player_age_season."
     )
     parser.add_argument(
         "--db-path",
-        default="ncaa-analytics/db/ncaa_d1_master.db",
+        default=DB_PATH,
         help="Path to SQLite DB.",
     )
     parser.add_argument(
@@ -96,7 +100,7 @@ def main() -> None:
         print(f"[ERROR] DB not found at: {db_path}")
         sys.exit(1)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
         if not table_exists(conn, "players"):
             print("[ERROR] Expected `players` table not found.")
@@ -115,92 +119,95 @@ def main() -> None:
         cur = conn.cursor()
 
         for season in seasons:
-            print(f"\n[INFO] Computing age features for season {season} ...")
-
-            cur.execute(
-                """
-                SELECT DISTINCT
-                    p.global_player_id,
-                    p.season,
-                    b.birthdate
-                FROM players p
-                JOIN dim_player_bio b
-                  ON b.global_player_id = p.global_player_id
-                WHERE p.season = ?
-                  AND b.birthdate IS NOT NULL
-                  AND b.birthdate != '';
-                """,
-                (season,),
-            )
-            rows = cur.fetchall()
-            if not rows:
-                print(
-                    f"[WARN] No players with birthdate found for season {season}. Skipping.")
-                continue
+            with span('ages.season', season) as s:
+                print(f"\n[INFO] Computing age features for season {season} ...")
 
-            ages = {}
-            for global_player_id, _, birthdate_str in rows:
-                age = compute_age(birthdate_str, season)
-                if age is None:
+                cur.execute(
+                    """
+                    SELECT DISTINCT
+                        p.global_player_id,
+                        p.season,
+                        b.birthdate
+                    FROM players p
+                    JOIN dim_player_bio b
+                      ON b.global_player_id = p.global_player_id
+                    WHERE p.season = ?
+                      AND b.birthdate IS NOT NULL
+                      AND b.birthdate != '';
+                    """,
+                    (season,),
+                )
+                rows = cur.fetchall()
+                s.rows_in = len(rows)
+                if not rows:
+                    print(
+                        f"[WARN] No players with birthdate found for season {season}. Skipping.")
                     continue
-                ages[global_player_id] = age
-
-            if not ages:
-                print(
-                    f"[WARN] Could not compute ages for any players in season {season}.")
-                continue
 
-            age_values = list(ages.values())
-            mu = mean(age_values)
-            sigma = pstdev(age_values) if len(age_values) > 1 else 0.0
+                ages = {}
+                for global_player_id, _, birthdate_str in rows:
+                    age = compute_age(birthdate_str, season)
+                    if age is None:
+                        continue
+                    ages[global_player_id] = age
 
-            print(
-                f"[INFO] Season {season}: N={len(age_values)}, "
-                f"mean age={mu:.2f}, std={sigma:.2f}"
-            )
+                if not ages:
+                    print(
+                        f"[WARN] Could not compute ages for any players in season {season}.")
+                    continue
 
-            for global_player_id, age in ages.items():
-                if sigma > 0:
-                    z = (age - mu) / sigma
-                else:
-                    z = 0.0
+                age_values = list(ages.values())
+                mu = mean(age_values)
+                sigma = pstdev(age_values) if len(age_values) > 1 else 0.0
 
-                is_young = int(z <= args.young_threshold)
-                is_old = int(z >= args.old_threshold)
+                print(
+                    f"[INFO] Season {season}: N={len(age_values)}, "
+                    f"mean age={mu:.2f}, std={sigma:.2f}"
+                )
 
-                cur.execute(
-                    """
-                    INSERT INTO fact_player_age_season (
-                        global_player_id,
-                        season,
-                        age_season,
-                        age_zscore,
-                        is_young_for_level,
-                        is_old_for_level,
-                        created_at,
-                        updated_at
+                for global_player_id, age in ages.items():
+                    if sigma > 0:
+                        z = (age - mu) / sigma
+                    else:
+                        z = 0.0
+
+                    is_young = int(z <= args.young_threshold)
+                    is_old = int(z >= args.old_threshold)
+
+                    cur.execute(
+                        """
+                        INSERT INTO fact_player_age_season (
+                            global_player_id,
+                            season,
+                            age_season,
+                            age_zscore,
+                            is_young_for_level,
+                            is_old_for_level,
+                            created_at,
+                            updated_at
+                        )
+                        VALUES (?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
+                        ON CONFLICT(global_player_id, season) DO UPDATE SET
+                            age_season = excluded.age_season,
+                            age_zscore = excluded.age_zscore,
+                            is_young_for_level = excluded.is_young_for_level,
+                            is_old_for_level = excluded.is_old_for_level,
+                            updated_at = datetime('now');
+                        """,
+                        (
+                            global_player_id,
+                            season,
+                            age,
+                            z,
+                            is_young,
+                            is_old,
+                        ),
                     )
-                    VALUES (?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
-                    ON CONFLICT(global_player_id, season) DO UPDATE SET
-                        age_season = excluded.age_season,
-                        age_zscore = excluded.age_zscore,
-                        is_young_for_level = excluded.is_young_for_level,
-                        is_old_for_level = excluded.is_old_for_level,
-                        updated_at = datetime('now');
-                    """,
-                    (
-                        global_player_id,
-                        season,
-                        age,
-                        z,
-                        is_young,
-                        is_old,
-                    ),
-                )
 
-            conn.commit()
-            print(
-                f"[INFO] Wrote age features for {len(ages)} players in season {season}.")
+                conn.commit()
+                s.rows_out = len(ages)
+                print(
+                    f"[INFO] Wrote age features for {len(ages)} players in season {season}.")
     finally:
         conn.close()
 
@@ -0,0 +1,178 @@
+"""
+One way to open the project's SQLite databases.
+
+connect() applies the tuned PRAGMAs every connection should have (WAL,
+synchronous=NORMAL, a larger page cache, memory-mapped reads, in-memory temp
+tables) and, for the master DB, brings its schema up to date with the
+MIGRATIONS list below. readonly=True opens the file read-only, so the
+dashboard can keep reading while a loader writes: in WAL mode readers and
+one writer don't block each other.
+
+Run directly to apply pending migrations and print the PRAGMAs in effect:
+    python scripts/db.py
+"""
+import argparse
+import os
+import sqlite3
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DB_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'db', 'ncaa_d1_master.db')
+
+# Applied to every connection (journal_mode only where we may write)
+PRAGMAS = [
+    ("synchronous", "NORMAL"),     # safe with WAL; no fsync per commit
+    ("cache_size", "-65536"),      # 64 MB page cache (negative = KiB)
+    ("mmap_size", "268435456"),    # read up to 256 MB straight from the page cache
+    ("temp_store", "MEMORY"),      # sorts and temp indexes off disk
+    ("busy_timeout", "30000"),     # wait for a writer (e.g. a parallel stage) instead of failing
+]
+
+
+class Migration(NamedTuple):
+    name: str
+    # (table, column or None) that must exist first; until then it is deferred
+    requires: Tuple[Tuple[str, Optional[str]], ...]
+    # SQL script, or a function of the connection for steps that need to look first
+    sql: Union[str, Callable[[sqlite3.Connection], None]]
+
+
+def _unique_indexes(conn: sqlite3.Connection, table: str, columns: Tuple[str, ...]) -> List[str]:
+    """Names of the unique indexes (constraints included) on exactly `columns` of `table`."""
+    names = []
+    for _, name, unique, *_ in conn.execute(f"PRAGMA index_list({table});"):
+        cols = tuple(row[2] for row in conn.execute(f"PRAGMA index_info({name});"))
+        if unique and cols == columns:
+            names.append(name)
+    return names
+
+
+def _stats_natural_key(conn: sqlite3.Connection) -> None:
+    # Older DBs created fact_player_stats without UNIQUE (player_id, season), so
+    # re-runs appended duplicate rows: keep the latest copy and add the key.
+    # Current DBs have the constraint; an index added on top of it is redundant.
+    keys = _unique_indexes(conn, 'fact_player_stats', ('player_id', 'season'))
+    if not keys:
+        cur = conn.execute("""
+        DELETE FROM fact_player_stats
+        WHERE stat_id NOT IN (
+            SELECT MAX(stat_id) FROM fact_player_stats GROUP BY player_id, season
+        );
+        """)
+        if cur.rowcount > 0:
+            print(f"Removed {cur.rowcount} duplicate fact_player_stats rows.")
+        conn.execute("""
+        CREATE UNIQUE INDEX ux_fact_player_stats_player_season
+        ON fact_player_stats (player_id, season);
+        """)
+    elif len(keys) > 1 and 'ux_fact_player_stats_player_season' in keys:
+        conn.execute("DROP INDEX ux_fact_player_stats_player_season;")
+
+
+# Append only; each runs once per DB and is recorded in schema_migrations
+MIGRATIONS = [
+    Migration(
+        "0001_base_secondary_indexes",
+        (("players", None), ("fact_player_stats", None)),
+        """
+        CREATE INDEX IF NOT EXISTS ix_players_season ON players (season);
+        CREATE INDEX IF NOT EXISTS ix_players_team_season ON players (team_id, season);
+        CREATE INDEX IF NOT EXISTS ix_fact_player_stats_season ON fact_player_stats (season);
+        """,
+    ),
+    Migration(
+        # Bio, age and DOB scripts join players to dim_player_bio on this
+        "0002_players_global_id_index",
+        (("players", "global_player_id"),),
+        """
+        CREATE INDEX IF NOT EXISTS ix_players_global_season
+        ON players (global_player_id, season);
+        """,
+    ),
+    Migration(
+        "0003_fact_player_stats_natural_key",
+        (("fact_player_stats", None),),
+        _stats_natural_key,
+    ),
+]
+
+
+def _has(conn: sqlite3.Connection, table: str, column: Optional[str]) -> bool:
+    cols = [row[1] for row in conn.execute(f"PRAGMA table_info({table});")]
+    return bool(cols) and (column is None or column in cols)
+
+
+def migrate(conn: sqlite3.Connection) -> List[str]:
+    """Applies the pending migrations whose tables exist. Returns their names."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        name TEXT PRIMARY KEY,
+        applied_at TEXT DEFAULT (datetime('now'))
+    );
+    """)
+    done = {name for (name,) in conn.execute("SELECT name FROM schema_migrations;")}
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.name in done:
+            continue
+        if not all(_has(conn, table, column) for table, column in migration.requires):
+            continue
+        with conn:
+            if callable(migration.sql):
+                migration.sql(conn)
+            else:
+                for statement in migration.sql.split(';'):
+                    if statement.strip():
+                        conn.execute(statement)
+            conn.execute("INSERT INTO schema_migrations (name) VALUES (?);", (migration.name,))
+        applied.append(migration.name)
+    return applied
+
+
+def connect(path: str = DB_PATH, readonly: bool = False, migrations: bool = True,
+            **kwargs) -> sqlite3.Connection:
+    """
+    Opens `path` with the project PRAGMAs. Writable connections switch the
+    file to WAL and, when `migrations` is set, apply MIGRATIONS (pass False
+    for the cache DBs, which have their own schema). Extra kwargs go to
+    sqlite3.connect (e.g. check_same_thread).
+    """
+    path = os.fspath(path)
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, **kwargs)
+        conn.execute("PRAGMA query_only = ON;")
+    else:
+        conn = sqlite3.connect(path, **kwargs)
+        conn.execute("PRAGMA journal_mode = WAL;")
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value};")
+    if migrations and not readonly:
+        migrate(conn)
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Apply pending schema migrations and show the connection PRAGMAs."
+    )
+    parser.add_argument("--db-path", default=DB_PATH, help="Path to SQLite DB.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"[ERROR] DB not found at: {args.db_path}")
+        raise SystemExit(1)
+
+    conn = connect(args.db_path, migrations=False)
+    try:
+        applied = migrate(conn)
+        print(f"[INFO] Applied migrations: {', '.join(applied) or 'none pending'}")
+        for name in ["journal_mode", *(name for name, _ in PRAGMAS)]:
+            print(f"  {name} = {conn.execute(f'PRAGMA {name};').fetchone()[0]}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
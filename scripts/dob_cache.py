@@ -0,0 +1,93 @@
+"""
+Persistent lookup cache for the DOB scraper (11_scrape_player_dobs_from_sportsref.py).
+
+Two small tables in a SQLite file:
+    dob_search:  player name -> Sports-Reference player URL (NULL = no match)
+    dob_pages:   player URL  -> birthdate (NULL = page has no birthdate)
+
+Negative answers are cached too, so a repeat run never searches for a known
+miss again. Only definitive answers are stored; 429s, 5xx and network errors
+are left for the next run.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from db import connect
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DOB_CACHE_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'cache', 'dob_cache.db')
+
+
+class DobCache:
+    def __init__(self, path: str = DOB_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = connect(path, migrations=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS dob_search (
+                full_name    TEXT PRIMARY KEY,
+                player_url   TEXT,
+                searched_at  TEXT DEFAULT (datetime('now'))
+            );
+
+            CREATE TABLE IF NOT EXISTS dob_pages (
+                player_url   TEXT PRIMARY KEY,
+                birthdate    TEXT,
+                fetched_at   TEXT DEFAULT (datetime('now'))
+            );
+            """
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _lookup(self, sql: str, keys: List[str]) -> Dict[str, Optional[str]]:
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            found.update(self.conn.execute(sql.format(placeholders), chunk).fetchall())
+        return found
+
+    def urls_for(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Cached search answers for `names`; a None value is a known miss."""
+        return self._lookup(
+            "SELECT full_name, player_url FROM dob_search WHERE full_name IN ({});",
+            list(set(names)),
+        )
+
+    def birthdates_for(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Cached page answers for `urls`; a None value is a page without a birthdate."""
+        return self._lookup(
+            "SELECT player_url, birthdate FROM dob_pages WHERE player_url IN ({});",
+            list(set(urls)),
+        )
+
+    def store(self, searches: List[Tuple[str, Optional[str]]],
+              pages: List[Tuple[str, Optional[str]]]) -> None:
+        """Saves (name, url) and (url, birthdate) answers in one transaction."""
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO dob_search (full_name, player_url, searched_at)
+                VALUES (?, ?, datetime('now'))
+                ON CONFLICT(full_name) DO UPDATE SET
+                    player_url = excluded.player_url,
+                    searched_at = excluded.searched_at;
+                """,
+                searches,
+            )
+            self.conn.executemany(
+                """
+                INSERT INTO dob_pages (player_url, birthdate, fetched_at)
+                VALUES (?, ?, datetime('now'))
+                ON CONFLICT(player_url) DO UPDATE SET
+                    birthdate = excluded.birthdate,
+                    fetched_at = excluded.fetched_at;
+                """,
+                pages,
+            )
@@ -0,0 +1,284 @@
+"""
+Shared fetch engine for the Sports-Reference scrapers.
+
+A thread pool fetches URLs while a single TokenBucket spaces every request
+(across all threads) to a configured requests/minute budget. A 429 pauses
+the whole bucket for Retry-After and slows the rate until requests succeed
+again, so we sit at the allowed ceiling instead of far below it.
+
+Each thread reuses one keep-alive requests.Session, and an optional
+HttpCache remembers ETag/Last-Modified so unchanged pages come back as 304.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from db import connect
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+HTTP_CACHE_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'cache', 'http_cache.db')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Used when a 429 comes without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 120.0
+
+
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """One pooled keep-alive session per thread (Session is not thread-safe)."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+class HttpCache:
+    """
+    Remembers ETag/Last-Modified per URL in a small SQLite file so refetches
+    can be sent as conditional GETs. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = HTTP_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = connect(path, migrations=False, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url            TEXT PRIMARY KEY,
+                    etag           TEXT,
+                    last_modified  TEXT,
+                    fetched_at     TEXT DEFAULT (datetime('now'))
+                );
+                """
+            )
+
+    def validators(self, url: str) -> dict:
+        """Request headers for a conditional GET of `url` (empty if unknown)."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified FROM http_cache WHERE url = ?;", (url,)
+            ).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers['If-None-Match'] = row[0]
+        if row and row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def store(self, url: str, resp: requests.Response) -> None:
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO http_cache (url, etag, last_modified, fetched_at)
+                VALUES (?, ?, ?, datetime('now'))
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    fetched_at = excluded.fetched_at;
+                """,
+                (url, etag, last_modified),
+            )
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a request may be sent.
+
+    With burst=1 requests are spaced exactly 60/rate_per_minute seconds apart.
+    penalize() pauses the bucket and halves the rate; reward() creeps the rate
+    back up to the configured ceiling after each success.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1, min_rate_per_minute: float = 1.0):
+        self.max_rate = rate_per_minute / 60.0
+        self.min_rate = min(min_rate_per_minute, rate_per_minute) / 60.0
+        self.rate = self.max_rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        start = max(self.updated, self.paused_until)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated = max(now, self.updated)
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, retry_after: float) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.paused_until = max(self.paused_until, now + retry_after)
+            self.tokens = 0.0
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self) -> None:
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate * 1.05)
+
+    @property
+    def rate_per_minute(self) -> float:
+        return self.rate * 60.0
+
+
+def parse_retry_after(value: Optional[str], default: float = DEFAULT_RETRY_AFTER) -> float:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int]
+    text: Optional[str] = None
+    final_url: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    not_modified: bool = False
+    retry_after: Optional[float] = None
+    job: object = None
+
+
+def fetch_with_retries(
+    url: str,
+    limiter: TokenBucket,
+    max_attempts: int = 3,
+    params: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    timeout: float = 30.0,
+    cache: Optional[HttpCache] = None,
+    conditional: bool = True,
+) -> FetchResult:
+    """
+    GET `url` under the shared limiter. 429s pause the limiter for Retry-After
+    and are retried; 5xx and connection errors retry with jittered backoff.
+    Any other status is returned as-is.
+
+    With a cache and conditional=True the request carries the stored
+    validators; a 304 comes back with not_modified=True and no text. Only ask
+    for a conditional GET when the caller still has the previous body.
+    """
+    result = FetchResult(url=url, status=None)
+    request_headers = dict(headers or HEADERS)
+    if cache is not None and conditional:
+        request_headers.update(cache.validators(url))
+
+    for attempt in range(1, max_attempts + 1):
+        result.attempts = attempt
+        limiter.acquire()
+        try:
+            resp = get_session().get(url, params=params, headers=request_headers, timeout=timeout)
+        except requests.RequestException as e:
+            result.error = str(e)
+            if attempt < max_attempts:
+                time.sleep(min(60.0, 2 ** attempt + random.uniform(0, 1)))
+            continue
+
+        result.status = resp.status_code
+        result.final_url = resp.url
+        result.error = None
+        if resp.status_code == 429:
+            retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+            result.retry_after = retry_after
+            limiter.penalize(retry_after)
+            print(f"\nHIT RATE LIMIT (429) on {url}. Pausing {retry_after:.0f}s, "
+                  f"rate now {limiter.rate_per_minute:.1f}/min.")
+            continue
+        if resp.status_code >= 500:
+            if attempt < max_attempts:
+                time.sleep(min(60.0, 2 ** attempt + random.uniform(0, 1)))
+            continue
+
+        limiter.reward()
+        if resp.status_code == 304:
+            result.not_modified = True
+            return result
+        if cache is not None and resp.status_code == 200:
+            cache.store(url, resp)
+        result.text = resp.text
+        return result
+    return result
+
+
+def fetch_many(
+    jobs: Iterable,
+    url_for: Callable[[object], str],
+    limiter: TokenBucket,
+    workers: int = 4,
+    max_attempts: int = 3,
+    cache: Optional[HttpCache] = None,
+    conditional_for: Optional[Callable[[object], bool]] = None,
+) -> Iterator[FetchResult]:
+    """
+    Fetches every job's URL on a thread pool and yields results as they
+    complete, so the caller can write to disk while the next requests are
+    in flight. Each result carries its originating job.
+
+    conditional_for(job) says whether a job may be sent as a conditional GET
+    (i.e. the caller still has the page); defaults to always.
+    """
+    def run(job):
+        conditional = conditional_for(job) if conditional_for else True
+        result = fetch_with_retries(
+            url_for(job), limiter, max_attempts, cache=cache, conditional=conditional)
+        result.job = job
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,323 @@
+"""
+Lightweight run instrumentation for the pipeline scripts.
+
+Wrap a stage's main() with @instrumented('<stage>') and its hot loops with
+`with span('<stage>.<step>', detail) as s:`, setting s.rows_in / s.rows_out
+where the code knows them (current_span() reaches the innermost open span
+from inside a decorated function). Each span records wall time, CPU time
+(including finished child processes, e.g. the parser pool), peak RSS so far
+and rows in/out.
+
+Spans are buffered and written to the pipeline_runs table in
+ncaa-analytics/cache/pipeline_runs.db when the outermost one ends. Spans of
+one process share a run id; pipeline.py passes its own run id
+(PIPELINE_RUN_ID) to every stage so a whole pipeline run groups together.
+Recording problems are reported and never fail the script.
+
+    python scripts/instrument.py runs                  # recent runs
+    python scripts/instrument.py compare               # last run vs the one before
+    python scripts/instrument.py compare --stage load  # last two runs of load
+    python scripts/instrument.py compare RUN_A RUN_B --stage load
+"""
+import argparse
+import functools
+import itertools
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from db import connect
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+RUNS_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'cache', 'pipeline_runs.db')
+
+RUN_ID_ENV = 'PIPELINE_RUN_ID'
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+
+RUN_ID = os.environ.get(RUN_ID_ENV) or new_run_id()
+
+
+def cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process or any finished child, in MB."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def init_runs_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS pipeline_runs (
+            id           INTEGER PRIMARY KEY,
+            run_id       TEXT NOT NULL,
+            span         TEXT NOT NULL,
+            detail       TEXT NOT NULL DEFAULT '',
+            depth        INTEGER NOT NULL,
+            started_at   TEXT NOT NULL,
+            wall_s       REAL NOT NULL,
+            cpu_s        REAL NOT NULL,
+            peak_rss_mb  REAL,
+            rows_in      INTEGER,
+            rows_out     INTEGER,
+            status       TEXT NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS ix_pipeline_runs_run ON pipeline_runs (run_id);
+        CREATE INDEX IF NOT EXISTS ix_pipeline_runs_span ON pipeline_runs (span, started_at);
+        """
+    )
+
+
+class Span:
+    """One timed block; use via span() or @instrumented."""
+
+    def __init__(self, name: str, detail: object = ''):
+        self.name = name
+        self.detail = '' if detail is None else str(detail)
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+
+    def __enter__(self) -> 'Span':
+        self.depth = len(_stack)
+        self.seq = next(_seq)
+        _stack.append(self)
+        self.started_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        self._wall = time.perf_counter()
+        self._cpu = cpu_seconds()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        wall = time.perf_counter() - self._wall
+        cpu = cpu_seconds() - self._cpu
+        _stack.pop()
+        if exc_type is None or (exc_type is SystemExit and exc.code in (None, 0)):
+            status = 'ok'
+        elif exc_type is SystemExit:
+            status = f'exit {exc.code}'
+        else:
+            status = exc_type.__name__
+        _pending.append((self.seq, RUN_ID, self.name, self.detail, self.depth, self.started_at, wall,
+                         cpu, peak_rss_mb(), self.rows_in, self.rows_out, status))
+        if not _stack:
+            flush()
+        return False
+
+
+_stack: List[Span] = []
+_pending: List[tuple] = []
+_seq = itertools.count()
+
+
+def span(name: str, detail: object = '') -> Span:
+    return Span(name, detail)
+
+
+def current_span() -> Span:
+    """The innermost open span, for setting row counts from a decorated function."""
+    return _stack[-1] if _stack else Span('unrecorded')
+
+
+def instrumented(name: str):
+    """Decorator: records every call of the function as a span called `name`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def flush(path: str = RUNS_PATH) -> None:
+    """Writes the buffered spans. Failures are printed, not raised."""
+    if not _pending:
+        return
+    # Spans finish inner-first; store them in the order they started
+    rows = [row[1:] for row in sorted(_pending)]
+    _pending.clear()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = connect(path, migrations=False)
+        try:
+            init_runs_schema(conn)
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO pipeline_runs (run_id, span, detail, depth, started_at, wall_s,
+                                               cpu_s, peak_rss_mb, rows_in, rows_out, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                    """,
+                    rows,
+                )
+        finally:
+            conn.close()
+    except (OSError, sqlite3.Error) as e:
+        print(f"[WARN] Could not record run timings to {path}: {e}")
+
+
+# --- REPORTING ---
+
+def list_runs(conn: sqlite3.Connection, limit: int = 20) -> List[tuple]:
+    """(run_id, started, top-level spans, summed top-level wall) of the newest runs."""
+    return conn.execute(
+        """
+        SELECT run_id, MIN(started_at),
+               GROUP_CONCAT(CASE WHEN depth = 0 THEN span END, ' '),
+               SUM(CASE WHEN depth = 0 THEN wall_s END)
+        FROM pipeline_runs
+        GROUP BY run_id
+        ORDER BY MIN(started_at) DESC, MAX(id) DESC
+        LIMIT ?;
+        """,
+        (limit,),
+    ).fetchall()
+
+
+def previous_run(runs: List[tuple], stage: Optional[str] = None) -> Optional[str]:
+    """The newest run before runs[0] that shares a top-level span (or `stage`) with it."""
+    wanted = {stage} if stage else set((runs[0][2] or '').split())
+    for run_id, _, spans, _ in runs[1:]:
+        if wanted & set((spans or '').split()):
+            return run_id
+    return None
+
+
+def run_summary(conn: sqlite3.Connection, run_id: str,
+                stage: Optional[str] = None) -> Dict[tuple, dict]:
+    """Per (span, detail) totals of a run; repeated spans are summed."""
+    sql = """
+        SELECT span, detail, MIN(depth), COUNT(*), SUM(wall_s), SUM(cpu_s),
+               MAX(peak_rss_mb), SUM(rows_in), SUM(rows_out),
+               GROUP_CONCAT(DISTINCT CASE WHEN status != 'ok' THEN status END), MIN(id)
+        FROM pipeline_runs
+        WHERE run_id = ?
+    """
+    params = [run_id]
+    if stage:
+        sql += " AND (span = ? OR span LIKE ?)"
+        params += [stage, f"{stage}.%"]
+    sql += " GROUP BY span, detail ORDER BY MIN(id);"
+    keys = ('depth', 'calls', 'wall_s', 'cpu_s', 'peak_rss_mb', 'rows_in', 'rows_out',
+            'errors', 'order')
+    return {(row[0], row[1]): dict(zip(keys, row[2:]))
+            for row in conn.execute(sql, params)}
+
+
+# (column, header, width, format); each column shows base, new and the change
+COMPARE_COLUMNS = [
+    ('wall_s', 'wall s', 8, '.2f'),
+    ('cpu_s', 'cpu s', 8, '.2f'),
+    ('peak_rss_mb', 'peak MB', 7, '.0f'),
+    ('rows_out', 'rows out', 9, 'd'),
+]
+
+
+def _fmt(value, width: int, spec: str) -> str:
+    return f"{'-' if value is None else format(value, spec):>{width}}"
+
+
+def _delta(old, new) -> str:
+    # Sub-10ms spans are mostly noise
+    if old is None or new is None or abs(old) < 0.01:
+        return ''
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def compare(conn: sqlite3.Connection, base: str, new: str, stage: Optional[str] = None) -> None:
+    a = run_summary(conn, base, stage)
+    b = run_summary(conn, new, stage)
+    if not a and not b:
+        print("[INFO] Nothing recorded for these runs.")
+        return
+    # The new run's spans in execution order; spans only the base run had (of
+    # the stages the new run ran) go after the span that preceded them there
+    keys = sorted(b, key=lambda k: b[k]['order'])
+    stages = {name.split('.')[0] for name, _ in b}
+    prev = None
+    for key in sorted(a, key=lambda k: a[k]['order']):
+        if key not in b and key[0].split('.')[0] in stages:
+            keys.insert(keys.index(prev) + 1 if prev else 0, key)
+        if key in b or key[0].split('.')[0] in stages:
+            prev = key
+    print(f"base {base}  ->  new {new}\n")
+    print(f"{'span':<34}" + ''.join(f"  {header:>{2 * width + 8}}"
+                                    for _, header, width, _ in COMPARE_COLUMNS))
+    for key in keys:
+        old, cur = a.get(key, {}), b.get(key, {})
+        depth = (cur or old)['depth']
+        label = ('  ' * depth + key[0] + (f" [{key[1]}]" if key[1] else ''))[:34]
+        line = f"{label:<34}"
+        for column, _, width, spec in COMPARE_COLUMNS:
+            line += (f"  {_fmt(old.get(column), width, spec)} {_fmt(cur.get(column), width, spec)}"
+                     f" {_delta(old.get(column), cur.get(column)):>6}")
+        print(line + (f"  {cur['errors']}" if cur.get('errors') else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List and compare the timings recorded in pipeline_runs."
+    )
+    parser.add_argument("--runs-db", default=RUNS_PATH, help="Path to the runs DB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_runs = sub.add_parser("runs", help="List recent runs.")
+    p_runs.add_argument("--limit", type=int, default=20)
+    p_cmp = sub.add_parser("compare", help="Compare two runs span by span.")
+    p_cmp.add_argument("base", nargs="?", help="Baseline run id (default: the latest earlier run of the same stages).")
+    p_cmp.add_argument("new", nargs="?", help="Run id to compare (default: the newest, of --stage if given).")
+    p_cmp.add_argument("--stage", help="Only spans of this stage, e.g. load.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.runs_db):
+        print(f"[ERROR] No runs recorded yet ({args.runs_db} not found).")
+        raise SystemExit(1)
+
+    conn = connect(args.runs_db, readonly=True)
+    try:
+        if args.command == "runs":
+            for run_id, started, spans, wall in list_runs(conn, args.limit):
+                print(f"{run_id:<24} {started}  {_fmt(wall, 8, '.2f')}s  {spans or ''}")
+            return
+
+        base, new = args.base, args.new
+        if new is None:
+            runs = list_runs(conn, 100)
+            if args.stage:
+                # The newest run of that stage, not just the newest run
+                runs = [run for run in runs if args.stage in (run[2] or '').split()]
+                if not runs:
+                    print(f"[ERROR] No recorded run of stage {args.stage}.")
+                    raise SystemExit(1)
+            new = runs[0][0]
+            if base is None:
+                base = previous_run(runs, args.stage)
+                if base is None:
+                    print("[ERROR] No earlier run of the same stages to compare with.")
+                    raise SystemExit(1)
+        compare(conn, base, new, args.stage)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Shared reader/writer for the per-year files in data_intermediate.
+
+Stage 02 writes them and stage 03 reads them. CSV files keep the raw
+Sports-Reference headers; Parquet files are stored in the fixed, typed schema
+below. Reads go through that schema either way, so every consumer sees the
+same snake_case names and dtypes whatever the format on disk.
+
+Run directly to benchmark CSV vs Parquet on existing intermediate files:
+    python scripts/intermediate_format.py --season 2025
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+INTER_DIR = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'data_intermediate')
+
+YEARS = [2021, 2022, 2023, 2024, 2025]
+
+FORMATS = ['csv', 'parquet']
+
+# normalized name -> (source headers as scraped, dtype)
+STATS_SCHEMA = {
+    'team_slug': (['team_slug'], 'string'),
+    'season': (['season'], 'Int64'),
+    'player': (['Player'], 'string'),
+    'pos': (['Pos'], 'string'),
+    'g': (['G'], 'Int64'),
+    'gs': (['GS'], 'Int64'),
+    'mp': (['MP'], 'float64'),
+    'fg': (['FG'], 'float64'),
+    'fga': (['FGA'], 'float64'),
+    'fg_pct': (['FG%'], 'float64'),
+    'three_p': (['3P'], 'float64'),
+    'three_pa': (['3PA'], 'float64'),
+    'three_p_pct': (['3P%'], 'float64'),
+    'two_p': (['2P'], 'float64'),
+    'two_pa': (['2PA'], 'float64'),
+    'two_p_pct': (['2P%'], 'float64'),
+    'efg_pct': (['eFG%'], 'float64'),
+    'ft': (['FT'], 'float64'),
+    'fta': (['FTA'], 'float64'),
+    'ft_pct': (['FT%'], 'float64'),
+    'orb': (['ORB'], 'float64'),
+    'drb': (['DRB'], 'float64'),
+    'trb': (['TRB'], 'float64'),
+    'ast': (['AST'], 'float64'),
+    'stl': (['STL'], 'float64'),
+    'blk': (['BLK'], 'float64'),
+    'tov': (['TOV'], 'float64'),
+    'pf': (['PF'], 'float64'),
+    'pts': (['PTS'], 'float64'),
+}
+
+ROSTER_SCHEMA = {
+    'team_slug': (['team_slug'], 'string'),
+    'season': (['season'], 'Int64'),
+    'player': (['Player'], 'string'),
+    'number': (['#'], 'string'),
+    'class_year': (['Class'], 'string'),
+    'pos': (['Pos'], 'string'),
+    'height': (['Ht', 'Height'], 'string'),
+    'weight': (['Wt', 'Weight'], 'string'),
+    'hometown': (['Hometown'], 'string'),
+    'high_school': (['High School'], 'string'),
+}
+
+KINDS = {
+    'per_game': STATS_SCHEMA,
+    'rosters': ROSTER_SCHEMA,
+}
+
+
+def _as_string(series):
+    # Whole numbers that pandas inferred as floats (e.g. weights with gaps)
+    # should read back as '180', not '180.0'.
+    if pd.api.types.is_float_dtype(series):
+        numbers = series.dropna()
+        if (numbers == numbers.round()).all():
+            series = series.astype('Int64')
+    return series.astype('string')
+
+
+def normalize(df, kind):
+    """Maps a raw per-game or roster frame onto the fixed schema for `kind`."""
+    schema = KINDS[kind]
+    out = pd.DataFrame(index=df.index)
+    for name, (sources, dtype) in schema.items():
+        source = next((c for c in sources if c in df.columns), None)
+        if source is None:
+            out[name] = pd.Series(pd.NA, index=df.index, dtype=dtype)
+        elif dtype == 'string':
+            out[name] = _as_string(df[source])
+        else:
+            out[name] = pd.to_numeric(df[source], errors='coerce').astype(dtype)
+    return out.reset_index(drop=True)
+
+
+def intermediate_path(year, kind, fmt):
+    return os.path.join(INTER_DIR, str(year), f'{kind}_all_d1_{year}.{fmt}')
+
+
+def write_intermediate(df, year, kind, fmt='csv'):
+    """Writes a raw parsed frame for `year`. Returns the path."""
+    path = intermediate_path(year, kind, fmt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == 'parquet':
+        normalize(df, kind).to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def find_intermediate(year, kind, fmt='auto'):
+    """
+    Path of the intermediate file to read, or None. 'auto' picks whichever of
+    the CSV and Parquet files was written most recently.
+    """
+    candidates = FORMATS if fmt == 'auto' else [fmt]
+    existing = [intermediate_path(year, kind, f) for f in candidates
+                if os.path.exists(intermediate_path(year, kind, f))]
+    if not existing:
+        return None
+    return max(existing, key=os.path.getmtime)
+
+
+def read_intermediate(path, kind, columns=None):
+    """
+    Reads an intermediate file as a normalized frame. Parquet is read with
+    only `columns`; CSV goes through normalize() so both look the same.
+    """
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+
+    df = normalize(pd.read_csv(path), kind)
+    return df[columns] if columns else df
+
+
+def benchmark_year(year, repeat=3):
+    """Round-trip time and on-disk size for CSV vs Parquet of one season."""
+    for kind in KINDS:
+        source = find_intermediate(year, kind, 'csv')
+        if source is None:
+            print(f"  {year} {kind}: no intermediate CSV")
+            continue
+        df = pd.read_csv(source)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for fmt in FORMATS:
+                path = os.path.join(tmp, f'{kind}.{fmt}')
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    if fmt == 'parquet':
+                        normalize(df, kind).to_parquet(path, index=False)
+                    else:
+                        df.to_csv(path, index=False)
+                write_s = (time.perf_counter() - start) / repeat
+
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    read_intermediate(path, kind)
+                read_s = (time.perf_counter() - start) / repeat
+
+                size_kb = os.path.getsize(path) / 1024
+                print(f"  {year} {kind:<8} {fmt:<8} rows={len(df):>6} "
+                      f"size={size_kb:>8.1f} KB write={write_s * 1000:>7.1f} ms "
+                      f"read={read_s * 1000:>7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark CSV vs Parquet for the intermediate per-year files."
+    )
+    parser.add_argument(
+        "--season",
+        type=int,
+        action="append",
+        help="Season year to benchmark. Repeatable. If omitted, uses all seasons.",
+    )
+    args = parser.parse_args()
+
+    for year in args.season or YEARS:
+        benchmark_year(year)
+
+
+if __name__ == "__main__":
+    main()
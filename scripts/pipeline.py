@@ -0,0 +1,381 @@
+"""
+Runs the numbered pipeline scripts as a dependency graph, rerunning only
+what a change can reach.
+
+Each Stage declares the script it runs, the stages it depends on, the files
+it reads and the files / DB tables it writes. Before running a stage we
+fingerprint its code, arguments, input files and the output digests of its
+upstream stages; if that matches the last successful run (kept in
+ncaa-analytics/cache/pipeline_state.db) and its outputs still exist, it is
+skipped. After a run its outputs are digested, so a stage that reran but
+produced identical data doesn't invalidate anything downstream. Stages whose
+dependencies are done run in parallel, each in its own process.
+
+Network stages (team list, scraping, DOB lookups) only run when asked for:
+    python scripts/pipeline.py                      # offline stages
+    python scripts/pipeline.py --network            # everything
+    python scripts/pipeline.py --stages seed_bio ages --force
+    python scripts/pipeline.py status
+"""
+import argparse
+import glob
+import hashlib
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from db import DB_PATH, connect
+from instrument import RUN_ID_ENV, new_run_id
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+STATE_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'cache', 'pipeline_state.db')
+LOG_DIR = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'logs', 'pipeline')
+
+WORKERS = 4
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    deps: List[str] = field(default_factory=list)
+    # Globs relative to the project root
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    tables: List[str] = field(default_factory=list)
+    # Helper modules whose changes should rerun the stage
+    code: List[str] = field(default_factory=list)
+    args: List[str] = field(default_factory=list)
+    network: bool = False
+
+
+RAW_PAGES = 'ncaa-analytics/data_raw/*/*.html'
+RAW_INDEX = 'ncaa-analytics/data_raw/raw_index.db'
+INTERMEDIATES = 'ncaa-analytics/data_intermediate/*/*_all_d1_*.*'
+TEAMS_CONFIG = 'configs/d1_teams_master.json'
+
+STAGES = [
+    Stage('teams', '00_fetch_team_slugs.py', outputs=[TEAMS_CONFIG], network=True),
+    Stage('scrape', '01_scrape_all_d1.py', deps=['teams'], inputs=[TEAMS_CONFIG],
+          outputs=[RAW_PAGES], code=['http_fetch.py', 'scrape_jobs.py', 'raw_store.py'],
+          network=True),
+    Stage('parse', '02_parse_stats_and_roster.py', deps=['scrape'],
+          inputs=[RAW_PAGES, RAW_INDEX], outputs=[INTERMEDIATES],
+          code=['intermediate_format.py', 'raw_store.py'], args=['--workers', '0']),
+    Stage('load', '03_load_sqlite_master.py', deps=['parse'],
+          inputs=[INTERMEDIATES, TEAMS_CONFIG],
+          tables=['teams', 'players', 'fact_player_stats', 'player_profiles',
+                  'player_profiles_version'],
+          code=['db.py', 'intermediate_format.py', 'player_profiles.py']),
+    Stage('analytics', '04_create_analytics_views.py', deps=['load'],
+          outputs=['ncaa-analytics/db/player_features.v*.arrow'],
+          tables=['fact_player_features', 'feature_norm_stats', 'fact_player_similarity'],
+          code=['db.py', 'player_features.py', 'player_profiles.py', 'similarity_index.py']),
+    Stage('global_ids', '05_add_global_player_ids.py', deps=['load'], tables=['players'],
+          code=['db.py']),
+    # 06 and 08 need the DB that load creates
+    Stage('nba_schema', '06_apply_nba_schema.py', deps=['load'], inputs=['schema/nba_schema.sql'],
+          tables=['dim_player_global', 'fact_nba_season'], code=['db.py']),
+    Stage('global_players', '07_bootstrap_dim_player_global_from_ncaa.py',
+          deps=['global_ids', 'nba_schema'], tables=['dim_player_global'], code=['db.py']),
+    Stage('bio_schema', '08_apply_player_bio_schema.py', deps=['load'],
+          inputs=['schema/player_bio_schema.sql'],
+          tables=['dim_player_bio'], code=['db.py']),
+    # 09 and 12 read players directly (names, physicals, seasons), not only
+    # through dim_player_global, so they depend on the stage that owns players
+    Stage('seed_bio', '09_seed_player_bio_from_players.py',
+          deps=['global_ids', 'global_players', 'bio_schema'], tables=['dim_player_bio'],
+          code=['db.py']),
+    Stage('dobs', '11_scrape_player_dobs_from_sportsref.py', deps=['seed_bio'],
+          tables=['dim_player_bio'], code=['db.py', 'dob_cache.py', 'http_fetch.py'],
+          network=True),
+    Stage('ages', '12_compute_age_features.py', deps=['global_ids', 'seed_bio', 'dobs'],
+          tables=['fact_player_age_season'], code=['db.py']),
+]
+STAGE_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+class PipelineState:
+    """Last successful fingerprint/digest per stage, plus a file-hash cache."""
+
+    def __init__(self, path: str = STATE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = connect(path, migrations=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS stage_state (
+                stage         TEXT PRIMARY KEY,
+                fingerprint   TEXT NOT NULL,
+                output_digest TEXT NOT NULL,
+                seconds       REAL,
+                finished_at   TEXT DEFAULT (datetime('now'))
+            );
+
+            -- Content hashes, reused while size and mtime are unchanged
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path      TEXT PRIMARY KEY,
+                size      INTEGER NOT NULL,
+                mtime_ns  INTEGER NOT NULL,
+                sha256    TEXT NOT NULL
+            );
+            """
+        )
+        self.file_cache = {path: (size, mtime, sha) for path, size, mtime, sha
+                           in self.conn.execute("SELECT * FROM file_hashes;")}
+        self.new_hashes = []
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, stage: str) -> Optional[Tuple[str, str]]:
+        """(fingerprint, output_digest) of the last successful run, or None."""
+        return self.conn.execute(
+            "SELECT fingerprint, output_digest FROM stage_state WHERE stage = ?;",
+            (stage,)).fetchone()
+
+    def record(self, stage: str, fingerprint: str, digest: str, seconds: float) -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO stage_state (stage, fingerprint, output_digest, seconds, finished_at)
+                VALUES (?, ?, ?, ?, datetime('now'))
+                ON CONFLICT(stage) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    output_digest = excluded.output_digest,
+                    seconds = excluded.seconds,
+                    finished_at = excluded.finished_at;
+                """,
+                (stage, fingerprint, digest, seconds),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?);", self.new_hashes)
+        self.new_hashes = []
+
+    def file_hash(self, path: str) -> str:
+        st = os.stat(path)
+        cached = self.file_cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        sha = h.hexdigest()
+        self.file_cache[path] = (st.st_size, st.st_mtime_ns, sha)
+        self.new_hashes.append((path, st.st_size, st.st_mtime_ns, sha))
+        return sha
+
+    def files_digest(self, patterns: List[str]) -> str:
+        """Digest of the names and contents of every file matching `patterns`."""
+        h = hashlib.sha256()
+        for pattern in patterns:
+            for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, pattern))):
+                if os.path.isfile(path):
+                    h.update(os.path.relpath(path, PROJECT_ROOT).encode())
+                    h.update(self.file_hash(path).encode())
+        return h.hexdigest()
+
+
+def table_digest(conn, table: str) -> str:
+    """Digest of a table's definition and rows ('missing' if it doesn't exist)."""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?;", (table,)).fetchone()
+    if row is None:
+        return 'missing'
+    h = hashlib.sha256(row[0].encode())
+    cur = conn.execute(f"SELECT * FROM {table};")
+    while True:
+        rows = cur.fetchmany(10000)
+        if not rows:
+            break
+        h.update(repr(rows).encode())
+    return h.hexdigest()
+
+
+def outputs_exist(stage: Stage) -> bool:
+    for pattern in stage.outputs:
+        if not glob.glob(os.path.join(PROJECT_ROOT, pattern)):
+            return False
+    if stage.tables:
+        if not os.path.exists(DB_PATH):
+            return False
+        conn = connect(DB_PATH, readonly=True)
+        try:
+            found = {name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table';")}
+        finally:
+            conn.close()
+        return set(stage.tables) <= found
+    return True
+
+
+def output_digest(stage: Stage, state: PipelineState) -> str:
+    h = hashlib.sha256(state.files_digest(stage.outputs).encode())
+    if stage.tables and os.path.exists(DB_PATH):
+        conn = connect(DB_PATH, readonly=True)
+        try:
+            for table in stage.tables:
+                h.update(f"{table}:{table_digest(conn, table)}".encode())
+        finally:
+            conn.close()
+    return h.hexdigest()
+
+
+def fingerprint(stage: Stage, state: PipelineState, upstream: Dict[str, str]) -> str:
+    """What the stage's result depends on: code, arguments, inputs and upstream outputs."""
+    h = hashlib.sha256()
+    h.update(state.files_digest([f'scripts/{name}' for name in [stage.script, *stage.code]]).encode())
+    h.update(repr(stage.args).encode())
+    h.update(state.files_digest(stage.inputs).encode())
+    for dep in stage.deps:
+        h.update(f"{dep}:{upstream.get(dep, '')}".encode())
+    return h.hexdigest()
+
+
+def run_script(stage: Stage, run_id: str) -> Tuple[int, float, str]:
+    """
+    Runs the stage's script from the project root, recording its timings under
+    `run_id`. Returns (exit code, seconds, log path).
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{stage.name}.log")
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        proc = subprocess.run(
+            [sys.executable, os.path.join(SCRIPT_DIR, stage.script), *stage.args],
+            cwd=PROJECT_ROOT, stdout=log, stderr=subprocess.STDOUT,
+            env={**os.environ, RUN_ID_ENV: run_id},
+        )
+    return proc.returncode, time.perf_counter() - start, log_path
+
+
+def select_stages(names: Optional[List[str]], network: bool) -> List[Stage]:
+    if names:
+        unknown = [n for n in names if n not in STAGE_BY_NAME]
+        if unknown:
+            raise SystemExit(f"[ERROR] Unknown stages: {', '.join(unknown)} "
+                             f"(known: {', '.join(STAGE_BY_NAME)})")
+        return [s for s in STAGES if s.name in names]
+    return [s for s in STAGES if network or not s.network]
+
+
+def run_pipeline(stages: List[Stage], force: bool = False, workers: int = WORKERS,
+                 dry_run: bool = False) -> bool:
+    """
+    Runs `stages` in dependency order, up to `workers` at a time. Dependencies
+    outside `stages` count as done with their last recorded outputs. Returns
+    True if nothing failed.
+    """
+    state = PipelineState()
+    selected = {s.name for s in stages}
+    digests = {}  # stage -> output digest, as of this run or the last one
+    for name in STAGE_BY_NAME:
+        prev = state.get(name)
+        if prev is not None:
+            digests[name] = prev[1]
+
+    pending = {s.name: s for s in stages}
+    running = {}
+    failed = set()
+    run_id = new_run_id()
+    start = time.perf_counter()
+
+    def ready(stage):
+        busy = {s.name for s, _ in running.values()}
+        return all(dep not in selected or (dep not in pending and dep not in busy)
+                   for dep in stage.deps)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            while pending or running:
+                for name in [n for n, s in pending.items() if ready(s)]:
+                    stage = pending.pop(name)
+                    if any(dep in failed for dep in stage.deps):
+                        print(f"[SKIP] {name}: upstream failed")
+                        failed.add(name)
+                        continue
+                    fp = fingerprint(stage, state, digests)
+                    prev = state.get(name)
+                    if not force and prev is not None and prev[0] == fp and outputs_exist(stage):
+                        print(f"[FRESH] {name}")
+                        continue
+                    reason = "forced" if force else "never run" if prev is None else \
+                        "inputs changed" if prev[0] != fp else "outputs missing"
+                    if dry_run:
+                        print(f"[STALE] {name}: {reason}")
+                        # Assume it would change its outputs
+                        digests[name] = f"dry-run:{fp}"
+                        continue
+                    print(f"[RUN]   {name}: {reason}")
+                    running[pool.submit(run_script, stage, run_id)] = (stage, fp)
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, fp = running.pop(future)
+                    code, seconds, log_path = future.result()
+                    if code != 0:
+                        failed.add(stage.name)
+                        print(f"[FAIL]  {stage.name} (exit {code}, {seconds:.1f}s); "
+                              f"see {os.path.relpath(log_path, PROJECT_ROOT)}")
+                        continue
+                    digest = output_digest(stage, state)
+                    unchanged = digests.get(stage.name) == digest
+                    digests[stage.name] = digest
+                    state.record(stage.name, fp, digest, seconds)
+                    print(f"[DONE]  {stage.name} in {seconds:.1f}s"
+                          + (" (outputs unchanged)" if unchanged else ""))
+    finally:
+        state.close()
+
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s"
+          + (f"; failed: {', '.join(sorted(failed))}" if failed else "."))
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the pipeline stages that are out of date, in dependency order."
+    )
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["run", "status"],
+        default="run",
+        help="run (default) or status: list stale stages without running anything.",
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        metavar="STAGE",
+        help=f"Only these stages. Known: {', '.join(STAGE_BY_NAME)}.",
+    )
+    parser.add_argument(
+        "--network",
+        action="store_true",
+        help="Include the stages that fetch from Sports-Reference (teams, scrape, dobs).",
+    )
+    parser.add_argument("--force", action="store_true", help="Rerun even if up to date.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS,
+        help="Stages to run at once.",
+    )
+    args = parser.parse_args()
+
+    stages = select_stages(args.stages, args.network)
+    ok = run_pipeline(stages, force=args.force, workers=args.workers,
+                      dry_run=args.command == "status")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
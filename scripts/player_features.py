@@ -0,0 +1,269 @@
+"""
+Similarity features shared by the dashboard (app.py) and the batch scripts.
+
+One place defines which stats describe a player, which player-seasons are
+compared (MIN_GAMES) and how they are normalized. build_feature_store()
+z-scores that population once and persists the matrix plus the
+normalization stats in the DB (fact_player_features, feature_norm_stats),
+tagged with data_version(): the feature definitions plus the
+player_profiles version that every changing profile refresh bumps.
+load_features() reads the stored z-scores with the population in one query
+when that tag is current, and only otherwise computes the same numbers in
+memory.
+
+write_snapshot() saves the dashboard's whole frame (ids, names, raw stats,
+z-scores, percentiles) as an uncompressed Arrow IPC file next to the DB.
+read_snapshot() memory-maps it, so numeric columns are used in place without
+parsing and every dashboard process shares the same page-cache pages. It is
+tagged with data_version() too, so a reload without a rebuild makes it stale.
+
+Run directly to time a dashboard cold start from SQL vs from the snapshot:
+    python scripts/player_features.py --repeat 5
+"""
+import argparse
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # optional; without it the dashboard builds its frame from SQL
+    pa = None
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+# Bump when the snapshot's columns or meaning change; old files are then ignored
+SNAPSHOT_VERSION = 2
+SNAPSHOT_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'db',
+                             f'player_features.v{SNAPSHOT_VERSION}.arrow')
+
+FEATURES = ['pts', 'trb', 'ast', 'stl',
+            'blk', 'fg_pct', 'three_p_pct', 'ts_pct']
+Z_COLUMNS = [f'{f}_z' for f in FEATURES]
+PCT_RANK_COLUMNS = [f'{f}_pct_rank' for f in FEATURES]
+
+# Fewer games than this is too small a sample to compare (the dashboard's g > 5)
+MIN_GAMES = 6
+
+# Descriptive columns the dashboard shows next to the features
+DASHBOARD_COLUMNS = ['full_name', 'team_slug', 'team_name', 'conference', 'season',
+                     'class_year', 'height', 'pos', 'g', 'mp', 'ft_pct']
+
+
+def _population_columns(columns: List[str]) -> List[str]:
+    return list(dict.fromkeys(['player_id', *columns, *FEATURES]))
+
+
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
+    for f in FEATURES:
+        df[f] = pd.to_numeric(df[f], errors='coerce').fillna(0)
+    return df
+
+
+def load_population(conn, columns: List[str]) -> pd.DataFrame:
+    """`columns` (plus player_id and the features) of every comparable player-season, cleaned."""
+    df = pd.read_sql(
+        f"SELECT {', '.join(_population_columns(columns))} FROM player_profiles "
+        f"WHERE g >= ? ORDER BY player_id",
+        conn, params=(MIN_GAMES,))
+    return _clean(df)
+
+
+def compute_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Mean and sample std of each feature, indexed by feature name."""
+    return pd.DataFrame({'mean': df[FEATURES].mean(), 'std': df[FEATURES].std()})
+
+
+def zscores(df: pd.DataFrame, stats: pd.DataFrame) -> np.ndarray:
+    """(n, len(FEATURES)) z-score matrix. A feature with no spread scores 0 for everyone."""
+    raw = df[FEATURES].to_numpy(dtype=np.float64)
+    mean = stats.loc[FEATURES, 'mean'].to_numpy()
+    std = stats.loc[FEATURES, 'std'].to_numpy()
+    z = (raw - mean) / np.where(std != 0, std, 1.0)
+    z[:, std == 0] = 0.0
+    return z
+
+
+def percentile_ranks(df: pd.DataFrame) -> pd.DataFrame:
+    """0-100 percentile of each feature within the population."""
+    return pd.DataFrame({col: df[f].rank(pct=True) * 100
+                         for f, col in zip(FEATURES, PCT_RANK_COLUMNS)}, index=df.index)
+
+
+def data_version(conn: sqlite3.Connection) -> Optional[str]:
+    """
+    What the feature store and the snapshot must have been built from: the
+    feature definitions and player_profiles_version (see player_profiles.py).
+    One single-row read; None if the profiles were never built.
+    """
+    try:
+        row = conn.execute("SELECT version FROM player_profiles_version WHERE id = 0;").fetchone()
+    except sqlite3.Error:
+        return None
+    return f"{MIN_GAMES}:{','.join(FEATURES)}:profiles:{row[0] if row else 0}"
+
+
+def build_feature_store(conn: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Normalizes the population and persists it. Returns player_id, season, pos
+    and the z-score columns, in player_id order.
+    """
+    source = data_version(conn)
+    df = load_population(conn, ['season', 'pos'])
+    stats = compute_stats(df)
+    features = df[['player_id', 'season', 'pos']].copy()
+    features[Z_COLUMNS] = zscores(df, stats)
+
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS fact_player_features;")
+        conn.execute(f"""
+        CREATE TABLE fact_player_features (
+            player_id INTEGER PRIMARY KEY,
+            {', '.join(f'{col} REAL NOT NULL' for col in Z_COLUMNS)}
+        );
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS feature_norm_stats (
+            feature TEXT PRIMARY KEY,
+            mean REAL,
+            std REAL,
+            n_rows INTEGER NOT NULL,
+            source_fingerprint TEXT NOT NULL,
+            built_at TEXT DEFAULT (datetime('now'))
+        );
+        """)
+        conn.executemany(
+            f"INSERT INTO fact_player_features VALUES ({', '.join('?' * (len(Z_COLUMNS) + 1))});",
+            features[['player_id', *Z_COLUMNS]].itertuples(index=False, name=None),
+        )
+        conn.execute("DELETE FROM feature_norm_stats;")
+        conn.executemany(
+            """
+            INSERT INTO feature_norm_stats (feature, mean, std, n_rows, source_fingerprint)
+            VALUES (?, ?, ?, ?, ?);
+            """,
+            [(f, float(row['mean']), float(row['std']), len(df), source)
+             for f, row in stats.iterrows()],
+        )
+    return features
+
+
+def stored_fingerprint(conn: sqlite3.Connection) -> Optional[str]:
+    """data_version() the persisted feature store was built from, if any."""
+    try:
+        row = conn.execute("SELECT source_fingerprint FROM feature_norm_stats LIMIT 1;").fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def load_features(conn: sqlite3.Connection, columns: List[str]) -> pd.DataFrame:
+    """
+    The comparable population with `columns`, the cleaned raw features and
+    their z-scores. When the persisted matrix is current, reads it joined to
+    the profiles in one query; otherwise normalizes in memory the same way.
+    """
+    version = data_version(conn)
+    if version is not None and stored_fingerprint(conn) == version:
+        # fact_player_features holds exactly the population it was built from
+        select = [f'p.{c}' for c in _population_columns(columns)] + [f'f.{c}' for c in Z_COLUMNS]
+        return _clean(pd.read_sql(
+            f"SELECT {', '.join(select)} FROM player_profiles p "
+            f"JOIN fact_player_features f ON f.player_id = p.player_id ORDER BY p.player_id",
+            conn))
+
+    df = load_population(conn, columns)
+    df[Z_COLUMNS] = zscores(df, compute_stats(df))
+    return df
+
+
+def dashboard_frame(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Everything the dashboard needs per player-season, built from the DB."""
+    df = load_features(conn, DASHBOARD_COLUMNS)
+    df[PCT_RANK_COLUMNS] = percentile_ranks(df)
+    return df
+
+
+def write_snapshot(df: pd.DataFrame, source: str, path: str = SNAPSHOT_PATH) -> int:
+    """
+    Writes `df` as an uncompressed Arrow IPC file tagged with the snapshot
+    version and `source` (its data_version()). Returns the file size in bytes.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        'snapshot_version': str(SNAPSHOT_VERSION),
+        'source_fingerprint': source,
+    })
+    # Replace atomically: running dashboards keep their mapping of the old file
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def read_snapshot(source: Optional[str], path: str = SNAPSHOT_PATH) -> Optional[pd.DataFrame]:
+    """
+    Memory-maps the snapshot if it exists, has the current version and was
+    built from `source` (data_version() of the DB); otherwise None. Numeric
+    columns stay backed by the mapping (read-only), so treat the frame as
+    immutable.
+    """
+    if pa is None or source is None or not os.path.exists(path):
+        return None
+    reader = pa.ipc.open_file(pa.memory_map(path))
+    meta = reader.schema.metadata or {}
+    if (meta.get(b'snapshot_version') != str(SNAPSHOT_VERSION).encode()
+            or meta.get(b'source_fingerprint') != source.encode()):
+        return None
+    return reader.read_all().to_pandas(split_blocks=True)
+
+
+def load_dashboard_frame(conn: sqlite3.Connection) -> pd.DataFrame:
+    """The snapshot when it matches the DB's current data, else dashboard_frame()."""
+    df = read_snapshot(data_version(conn))
+    return df if df is not None else dashboard_frame(conn)
+
+
+def benchmark(conn: sqlite3.Connection, repeat=5):
+    """Cold-start time of the dashboard frame: SQL + pandas vs the mapped snapshot."""
+    try:
+        source = data_version(conn)
+        for label, load in (("sql", lambda: dashboard_frame(conn)),
+                            ("snapshot", lambda: read_snapshot(source))):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                df = load()
+                times.append(time.perf_counter() - start)
+            if df is None:
+                print(f"  {label:<8}: no current snapshot (run 04_create_analytics_views.py)")
+                continue
+            print(f"  {label:<8}: {len(df)} rows, best {min(times) * 1000:.1f} ms, "
+                  f"median {sorted(times)[len(times) // 2] * 1000:.1f} ms")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the dashboard's data load from SQL vs the feature snapshot."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Only as a script: app.py imports this module as scripts.player_features
+    from db import connect
+    benchmark(connect(readonly=True), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
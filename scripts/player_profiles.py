@@ -0,0 +1,200 @@
+"""
+Materialized player profiles: one row per player-season with the team and
+stat columns the dashboard, the similarity build and analytics queries read.
+
+player_profiles replaces the view_player_profiles join (fact_player_stats x
+players x teams). The loader (03_load_sqlite_master.py) refreshes a season's
+rows in the same transaction that loads it; 04_create_analytics_views.py
+backfills any season whose rows no longer match the join (older loaders,
+edits to the base tables, an interrupted refresh) and keeps
+view_player_profiles as an alias for ad-hoc queries. A refresh that
+changes rows bumps player_profiles_version, so derived data (the dashboard
+snapshot) can tell it was built from older profiles; one that finds them
+identical writes nothing.
+
+Run directly to compare query times against the old join:
+    python scripts/player_profiles.py --repeat 20
+"""
+import argparse
+import sqlite3
+import time
+from typing import Iterable, List
+
+from db import DB_PATH, connect
+
+# The old view's SELECT, kept for refreshes and the benchmark
+PROFILE_SELECT = """
+SELECT
+    p.player_id,
+    p.full_name,
+    p.team_id,
+    t.team_slug,
+    t.team_name,
+    t.conference,
+    p.season,
+    p.class_year,
+    p.height,
+    p.weight,
+    p.pos,
+    s.g,
+    s.gs,
+    s.mp,
+    s.pts,
+    s.trb,
+    s.ast,
+    s.stl,
+    s.blk,
+    s.fg_pct,
+    s.three_p_pct,
+    s.ft_pct,
+    s.ts_pct
+FROM fact_player_stats s
+JOIN players p ON s.player_id = p.player_id
+JOIN teams t ON p.team_id = t.team_id
+"""
+
+# The old view's columns (it had no team_id), for the view_player_profiles alias
+VIEW_COLUMNS = ['player_id', 'full_name', 'team_slug', 'team_name', 'conference', 'season',
+                'class_year', 'height', 'weight', 'pos', 'g', 'gs', 'mp', 'pts', 'trb', 'ast',
+                'stl', 'blk', 'fg_pct', 'three_p_pct', 'ft_pct', 'ts_pct']
+
+
+def init_profile_schema(conn: sqlite3.Connection) -> None:
+    """Creates player_profiles and its indexes (the base-table ones are in db.MIGRATIONS)."""
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS player_profiles (
+        player_id INTEGER PRIMARY KEY,
+        full_name TEXT NOT NULL,
+        team_id INTEGER NOT NULL,
+        team_slug TEXT,
+        team_name TEXT,
+        conference TEXT,
+        season INTEGER NOT NULL,
+        class_year TEXT,
+        height TEXT,
+        weight TEXT,
+        pos TEXT,
+        g INTEGER,
+        gs INTEGER,
+        mp REAL,
+        pts REAL,
+        trb REAL,
+        ast REAL,
+        stl REAL,
+        blk REAL,
+        fg_pct REAL,
+        three_p_pct REAL,
+        ft_pct REAL,
+        ts_pct REAL
+    );
+
+    -- Season leaderboards: WHERE season = ? AND g >= ? ORDER BY pts DESC
+    CREATE INDEX IF NOT EXISTS ix_player_profiles_season_pts
+    ON player_profiles (season, pts, g);
+
+    -- Team rosters: WHERE team_slug = ? (AND season = ?)
+    CREATE INDEX IF NOT EXISTS ix_player_profiles_team_season
+    ON player_profiles (team_slug, season);
+
+    -- Player lookups by name across seasons
+    CREATE INDEX IF NOT EXISTS ix_player_profiles_name_season
+    ON player_profiles (full_name, season);
+
+    -- One row, bumped by every refresh_profiles() that changes rows
+    CREATE TABLE IF NOT EXISTS player_profiles_version (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        version INTEGER NOT NULL
+    );
+    """)
+
+
+def refresh_profiles(conn: sqlite3.Connection, seasons: Iterable[int]) -> int:
+    """
+    Brings the profile rows of `seasons` in line with the base tables,
+    writing only rows that differ, and bumps player_profiles_version if any
+    did. Runs in the caller's transaction. Returns the number of rows written
+    or deleted.
+    """
+    changed = 0
+    for season in seasons:
+        cur = conn.execute(f"""
+        DELETE FROM player_profiles
+        WHERE season = ? AND player_id NOT IN (
+            SELECT player_id FROM ({PROFILE_SELECT} WHERE s.season = ?)
+        );
+        """, (season, season))
+        changed += cur.rowcount
+        # player_profiles has PROFILE_SELECT's columns in the same order
+        cur = conn.execute(f"""
+        INSERT OR REPLACE INTO player_profiles
+        {PROFILE_SELECT} WHERE s.season = ?
+        EXCEPT
+        SELECT * FROM player_profiles WHERE season = ?;
+        """, (season, season))
+        changed += cur.rowcount
+    if changed:
+        conn.execute("""
+        INSERT INTO player_profiles_version (id, version) VALUES (0, 1)
+        ON CONFLICT (id) DO UPDATE SET version = version + 1;
+        """)
+    return changed
+
+
+def stale_seasons(conn: sqlite3.Connection) -> List[int]:
+    """
+    Seasons with a profile row that is missing, extra or differs from the
+    join (incl. never built). Compares every column, so it costs about one
+    run of the join.
+    """
+    rows = conn.execute(f"""
+    SELECT season FROM ({PROFILE_SELECT} EXCEPT SELECT * FROM player_profiles)
+    UNION
+    SELECT season FROM (SELECT * FROM player_profiles EXCEPT {PROFILE_SELECT})
+    ORDER BY season;
+    """).fetchall()
+    return [season for (season,) in rows]
+
+
+def benchmark(repeat=20):
+    """Median time of the app's typical queries: old join vs materialized table."""
+    conn = connect(DB_PATH)
+    try:
+        conn.execute(f"CREATE TEMP VIEW profiles_join AS {PROFILE_SELECT};")
+        season, team, player, name = conn.execute(
+            "SELECT season, team_slug, player_id, full_name FROM player_profiles "
+            "ORDER BY season DESC, pts DESC LIMIT 1;").fetchone()
+        queries = {
+            "population": ("SELECT player_id, full_name, team_slug, season, pos, pts, trb, ast, stl, "
+                           "blk, fg_pct, three_p_pct, ts_pct FROM {} WHERE g >= 6 ORDER BY player_id", ()),
+            "leaders": ("SELECT * FROM {} WHERE season = ? AND g >= 6 ORDER BY pts DESC LIMIT 5",
+                        (season,)),
+            "roster": ("SELECT * FROM {} WHERE team_slug = ? AND season = ?", (team, season)),
+            "player": ("SELECT * FROM {} WHERE player_id = ?", (player,)),
+            "career": ("SELECT * FROM {} WHERE full_name = ? ORDER BY season", (name,)),
+        }
+        for label, (sql, params) in queries.items():
+            times = {}
+            for source in ("profiles_join", "player_profiles"):
+                runs = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    conn.execute(sql.format(source), params).fetchall()
+                    runs.append(time.perf_counter() - start)
+                times[source] = sorted(runs)[len(runs) // 2] * 1000
+            print(f"  {label:<10} join {times['profiles_join']:8.3f} ms   "
+                  f"table {times['player_profiles']:8.3f} ms")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark player_profiles against the view_player_profiles join."
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
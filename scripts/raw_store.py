@@ -0,0 +1,240 @@
+"""
+Compressed, content-addressed store for raw Sports-Reference pages.
+
+Pages are stored once per distinct content as
+    data_raw/blobs/<sha256[:2]>/<sha256>.html.<codec>
+and a small SQLite index maps (slug, season, fetched_at) to the blob. A
+re-download with identical content writes nothing new. zstd is used when the
+`zstandard` package is installed, gzip otherwise; both decode transparently.
+
+Usage:
+    python scripts/raw_store.py import --season 2025   # ingest data_raw/<year>/*.html
+    python scripts/raw_store.py bench --season 2025    # footprint + read throughput
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import os
+import time
+from typing import List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+from db import connect
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+RAW_DIR = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'data_raw')
+BLOB_DIR = os.path.join(RAW_DIR, 'blobs')
+INDEX_PATH = os.path.join(RAW_DIR, 'raw_index.db')
+
+YEARS = [2021, 2022, 2023, 2024, 2025]
+
+
+def default_codec() -> str:
+    return 'zst' if zstandard is not None else 'gz'
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zst':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def read_raw_html(path: str) -> str:
+    """Reads a page from a plain .html file or a .gz/.zst blob."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; pip install zstandard to read it.")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif path.endswith('.gz'):
+        data = gzip.decompress(data)
+    return data.decode('utf-8')
+
+
+class RawStore:
+    def __init__(self, index_path: str = INDEX_PATH, blob_dir: str = BLOB_DIR,
+                 codec: Optional[str] = None):
+        self.blob_dir = blob_dir
+        self.codec = codec or default_codec()
+        if self.codec not in ('gz', 'zst'):
+            raise ValueError(f"Unknown codec {self.codec!r}; use 'gz' or 'zst'.")
+        if self.codec == 'zst' and zstandard is None:
+            raise ValueError("The zst codec needs the zstandard package; pip install zstandard.")
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        # Callers serialize access; this lets a server read from worker threads
+        self.conn = connect(index_path, migrations=False, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS raw_blobs (
+                sha256       TEXT PRIMARY KEY,
+                codec        TEXT NOT NULL,
+                raw_size     INTEGER NOT NULL,
+                stored_size  INTEGER NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS raw_pages (
+                slug        TEXT NOT NULL,
+                season      INTEGER NOT NULL,
+                fetched_at  TEXT NOT NULL,
+                sha256      TEXT NOT NULL REFERENCES raw_blobs(sha256),
+                PRIMARY KEY (slug, season, fetched_at)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def blob_path(self, sha256: str, codec: str) -> str:
+        return os.path.join(self.blob_dir, sha256[:2], f"{sha256}.html.{codec}")
+
+    def has(self, slug: str, season: int) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM raw_pages WHERE slug = ? AND season = ? LIMIT 1;", (slug, season)
+        ).fetchone()
+        return row is not None
+
+    def latest_hash(self, slug: str, season: int) -> Optional[str]:
+        row = self.conn.execute(
+            """
+            SELECT sha256 FROM raw_pages WHERE slug = ? AND season = ?
+            ORDER BY fetched_at DESC LIMIT 1;
+            """,
+            (slug, season),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, slug: str, season: int, text: str, fetched_at: Optional[str] = None) -> bool:
+        """
+        Stores a fetched page. Returns False (and writes nothing) if it is
+        identical to the latest copy already stored for (slug, season).
+        """
+        data = text.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        if self.latest_hash(slug, season) == sha256:
+            return False
+
+        row = self.conn.execute(
+            "SELECT codec FROM raw_blobs WHERE sha256 = ?;", (sha256,)
+        ).fetchone()
+        if row is None:
+            path = self.blob_path(sha256, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            packed = compress(data, self.codec)
+            tmp_path = path + '.part'
+            with open(tmp_path, 'wb') as f:
+                f.write(packed)
+            os.replace(tmp_path, path)
+            self.conn.execute(
+                "INSERT INTO raw_blobs (sha256, codec, raw_size, stored_size) VALUES (?, ?, ?, ?);",
+                (sha256, self.codec, len(data), len(packed)),
+            )
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO raw_pages (slug, season, fetched_at, sha256) VALUES (?, ?, ?, ?);",
+            (slug, season, fetched_at or time.strftime('%Y-%m-%dT%H:%M:%S'), sha256),
+        )
+        self.conn.commit()
+        return True
+
+    def latest(self, season: int) -> List[Tuple[str, str, str]]:
+        """(slug, sha256, blob path) of the newest copy of every page in `season`, by slug."""
+        rows = self.conn.execute(
+            """
+            SELECT p.slug, p.sha256, b.codec
+            FROM raw_pages p
+            JOIN raw_blobs b ON b.sha256 = p.sha256
+            WHERE p.season = ?
+              AND p.fetched_at = (
+                  SELECT MAX(fetched_at) FROM raw_pages
+                  WHERE slug = p.slug AND season = p.season
+              )
+            ORDER BY p.slug;
+            """,
+            (season,),
+        ).fetchall()
+        return [(slug, sha256, self.blob_path(sha256, codec)) for slug, sha256, codec in rows]
+
+    def read(self, slug: str, season: int) -> Optional[str]:
+        sha256 = self.latest_hash(slug, season)
+        if sha256 is None:
+            return None
+        codec = self.conn.execute(
+            "SELECT codec FROM raw_blobs WHERE sha256 = ?;", (sha256,)
+        ).fetchone()[0]
+        return read_raw_html(self.blob_path(sha256, codec))
+
+
+def import_season(store: RawStore, year: int) -> None:
+    """Ingests plain data_raw/<year>/*.html files, using their mtime as fetched_at."""
+    files = sorted(glob.glob(os.path.join(RAW_DIR, str(year), "*.html")))
+    added = 0
+    for filepath in files:
+        slug = os.path.basename(filepath).split('_')[0]
+        fetched_at = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(os.path.getmtime(filepath)))
+        with open(filepath, 'r', encoding='utf-8') as f:
+            added += store.put(slug, year, f.read(), fetched_at)
+    print(f"{year}: {len(files)} files, {added} stored, {len(files) - added} already present")
+
+
+def bench_season(store: RawStore, year: int) -> None:
+    """Disk footprint and read+decode throughput, plain files vs the store."""
+    files = sorted(glob.glob(os.path.join(RAW_DIR, str(year), "*.html")))
+    blobs = [path for _, _, path in store.latest(year)]
+
+    for label, paths in (("plain", files), ("store", blobs)):
+        if not paths:
+            print(f"  {year} {label:<6} no pages")
+            continue
+        disk = sum(os.path.getsize(p) for p in paths)
+        start = time.perf_counter()
+        raw = sum(len(read_raw_html(p)) for p in paths)
+        elapsed = time.perf_counter() - start
+        print(f"  {year} {label:<6} pages={len(paths):>5} disk={disk / 2**20:>8.1f} MB "
+              f"html={raw / 2**20:>8.1f} MB read={raw / 2**20 / max(elapsed, 1e-9):>7.1f} MB/s "
+              f"({len(paths) / max(elapsed, 1e-9):,.0f} pages/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Manage the compressed raw page store."
+    )
+    parser.add_argument("command", choices=["import", "bench"])
+    parser.add_argument(
+        "--season",
+        type=int,
+        action="append",
+        help="Season year, e.g. 2025. Repeatable. If omitted, uses all seasons.",
+    )
+    parser.add_argument(
+        "--codec",
+        choices=["gz", "zst"],
+        default=None,
+        help="Compression for new blobs. Defaults to zst if zstandard is installed, else gz.",
+    )
+    args = parser.parse_args()
+    if args.codec == 'zst' and zstandard is None:
+        parser.error("--codec zst needs the zstandard package (pip install zstandard).")
+
+    store = RawStore(codec=args.codec)
+    try:
+        for year in args.season or YEARS:
+            if args.command == "import":
+                import_season(store, year)
+            else:
+                bench_season(store, year)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Offline stand-in for sports-reference.com, for testing and benchmarking the
+scrapers without touching the real site.
+
+Team pages are replayed from data_raw/<year>/ (or the raw store). Player
+search redirects to a synthetic player page carrying a birthDate, so the DOB
+scraper works end to end. Latency, 429s (with Retry-After) and 404s are
+injected on request; a page chosen to 404 always 404s, like a missing team.
+Team pages carry an ETag, so conditional GETs get 304s.
+
+Usage:
+    python scripts/replay_server.py serve --port 8765 --p429 0.05
+    python scripts/replay_server.py bench --season 2024 --teams 50
+
+bench runs 01_scrape_all_d1.py and 11_scrape_player_dobs_from_sportsref.py
+against the server in a throwaway copy of the project, each twice to show
+the conditional-GET and DOB caches, and reports requests/sec, p50/p99
+server latency and retries.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+import lxml.html
+
+from raw_store import RawStore, read_raw_html
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+RAW_DIR = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'data_raw')
+
+TEAM_PAGE_RE = re.compile(r'^/cbb/schools/([^/]+)/(\d{4})\.html$')
+PLAYER_PAGE_RE = re.compile(r'^/cbb/players/([^/]+)\.html$')
+SEARCH_PATH = '/cbb/search/search.fcgi'
+
+PLAYER_PAGE = """<html><head><title>{name} College Stats</title></head><body>
+<div id="meta"><h1>{name}</h1>
+<p><strong>Born:</strong> <span itemprop="birthDate" id="necro-birth" data-birth="{dob}">{dob}</span></p>
+</div></body></html>"""
+
+SEARCH_PAGE = """<html><body><div class="search-results"><table><tbody>
+<tr><th><a href="/cbb/players/{player_id}.html">{name}</a></th></tr>
+</tbody></table></div></body></html>"""
+
+
+def _fraction(key: str) -> float:
+    """Stable pseudo-random number in [0, 1) for `key`."""
+    return int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) / 2**32
+
+
+def player_id(name: str) -> str:
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+    return f"{slug}-1"
+
+
+def synthetic_dob(player: str) -> str:
+    f = _fraction('dob:' + player)
+    return f"{1998 + int(f * 8)}-{1 + int(f * 1000) % 12:02d}-{1 + int(f * 100000) % 28:02d}"
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, raw_dir: str = RAW_DIR, store: Optional[RawStore] = None,
+                 latency_ms: float = 0.0, p429: float = 0.0, p404: float = 0.0,
+                 retry_after: int = 1, seed: int = 0):
+        super().__init__(address, ReplayHandler)
+        self.raw_dir = raw_dir
+        self.store = store
+        self.latency = latency_ms / 1000.0
+        self.p429 = p429
+        self.p404 = p404
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.log: List[Tuple[str, int, float]] = []
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def record(self, path: str, status: int, seconds: float) -> None:
+        with self.lock:
+            self.log.append((path, status, seconds))
+
+    def take_log(self) -> List[Tuple[str, int, float]]:
+        with self.lock:
+            log, self.log = self.log, []
+        return log
+
+    def team_page(self, slug: str, year: int) -> Optional[str]:
+        if self.store is not None:
+            with self.lock:  # sqlite connection is not shared across threads
+                return self.store.read(slug, year)
+        path = os.path.join(self.raw_dir, str(year), f"{slug}_{year}.html")
+        return read_raw_html(path) if os.path.exists(path) else None
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real site
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        status = self.route(url.path, parse_qs(url.query))
+        self.server.record(url.path + ('?' + url.query if url.query else ''), status,
+                           time.perf_counter() - start)
+
+    def route(self, path: str, query: dict) -> int:
+        server = self.server
+        if server.latency > 0:
+            time.sleep(server.latency * (0.5 + server.draw()))
+        if server.p429 > 0 and server.draw() < server.p429:
+            return self.send(429, b'Too Many Requests', {'Retry-After': str(server.retry_after)})
+        if server.p404 > 0 and _fraction('404:' + path) < server.p404:
+            return self.send(404, b'Not Found')
+
+        match = TEAM_PAGE_RE.match(path)
+        if match:
+            text = server.team_page(match.group(1), int(match.group(2)))
+            if text is None:
+                return self.send(404, b'Not Found')
+            body = text.encode('utf-8')
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                return self.send(304, b'', {'ETag': etag})
+            return self.send(200, body, {'ETag': etag})
+
+        if path == SEARCH_PATH:
+            name = query.get('search', [''])[0]
+            if not name:
+                return self.send(404, b'Not Found')
+            pid = player_id(name)
+            # Most names redirect straight to the player; some get a results page
+            if _fraction('search:' + name) < 0.75:
+                return self.send(302, b'', {'Location': f"/cbb/players/{quote(pid)}.html"})
+            return self.send(200, SEARCH_PAGE.format(player_id=pid, name=name).encode('utf-8'))
+
+        match = PLAYER_PAGE_RE.match(path)
+        if match:
+            pid = match.group(1)
+            name = pid.rsplit('-', 1)[0].replace('-', ' ').title()
+            page = PLAYER_PAGE.format(name=name, dob=synthetic_dob(pid))
+            return self.send(200, page.encode('utf-8'))
+
+        return self.send(404, b'Not Found')
+
+    def send(self, status: int, body: bytes, headers: Optional[dict] = None) -> int:
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        return status
+
+
+def start_server(port: int = 0, **kwargs) -> ReplayServer:
+    """Starts a ReplayServer on a background thread. port=0 picks a free port."""
+    server = ReplayServer(('127.0.0.1', port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def report(label: str, log: List[Tuple[str, int, float]], elapsed: float) -> None:
+    """
+    requests/sec, p50/p99 server latency and status mix. A repeat request for
+    a URL counts as a retry if its previous answer was a 429/5xx, otherwise
+    as a duplicate fetch (wasted work on the client side).
+    """
+    latencies = [seconds for _, _, seconds in log]
+    statuses = {}
+    last_status = {}
+    retries = duplicates = 0
+    for path, status, _ in log:
+        statuses[status] = statuses.get(status, 0) + 1
+        if path in last_status:
+            if last_status[path] == 429 or last_status[path] >= 500:
+                retries += 1
+            else:
+                duplicates += 1
+        last_status[path] = status
+    mix = ' '.join(f"{status}:{count}" for status, count in sorted(statuses.items()))
+    print(f"  {label:<14} requests={len(log):>6} time={elapsed:>7.1f}s "
+          f"rate={len(log) / max(elapsed, 1e-9):>7.1f} req/s "
+          f"p50={_percentile(latencies, 50) * 1000:>6.1f} ms "
+          f"p99={_percentile(latencies, 99) * 1000:>6.1f} ms "
+          f"retries={retries} duplicates={duplicates} [{mix}]")
+
+
+def make_workspace(teams: List[str]) -> str:
+    """Throwaway project copy so benchmark runs never touch real data or queues."""
+    root = tempfile.mkdtemp(prefix='scrape_bench_')
+    shutil.copytree(SCRIPT_DIR, os.path.join(root, 'scripts'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    os.makedirs(os.path.join(root, 'configs'))
+    with open(os.path.join(root, 'configs', 'd1_teams_master.json'), 'w') as f:
+        json.dump([{'slug': slug, 'name': slug} for slug in teams], f)
+    return root
+
+
+def team_page_players(raw_dir: str, season: int) -> List[Tuple[str, str]]:
+    """(team_slug, player name) for every linked player on the scraped team pages."""
+    players = []
+    season_dir = os.path.join(raw_dir, str(season))
+    for name in sorted(os.listdir(season_dir)) if os.path.isdir(season_dir) else []:
+        doc = lxml.html.fromstring(read_raw_html(os.path.join(season_dir, name)))
+        names = doc.xpath('//a[starts-with(@href, "/cbb/players/")]/text()')
+        players.extend((name.split('_')[0], player) for player in dict.fromkeys(names))
+    return players
+
+
+def make_dob_db(path: str, season: int, players: List[Tuple[str, str]]) -> None:
+    """Minimal teams + players + dim_player_bio with every (team_slug, name) missing a DOB."""
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE teams (team_id INTEGER PRIMARY KEY, team_slug TEXT UNIQUE);")
+        conn.execute("CREATE TABLE players (global_player_id TEXT, team_id INTEGER, season INTEGER);")
+        conn.execute(
+            "CREATE TABLE dim_player_bio (global_player_id TEXT PRIMARY KEY, full_name TEXT, "
+            "birthdate TEXT, updated_at TEXT);"
+        )
+        team_ids = {slug: i for i, slug in enumerate(dict.fromkeys(slug for slug, _ in players))}
+        conn.executemany("INSERT INTO teams VALUES (?, ?);", [(i, slug) for slug, i in team_ids.items()])
+        rows = [(f"G{i:06d}", slug, name) for i, (slug, name) in enumerate(players)]
+        conn.executemany("INSERT INTO players VALUES (?, ?, ?);",
+                         [(gid, team_ids[slug], season) for gid, slug, _ in rows])
+        conn.executemany("INSERT INTO dim_player_bio (global_player_id, full_name) VALUES (?, ?);",
+                         [(gid, name) for gid, _, name in rows])
+    conn.close()
+
+
+def run_script(root: str, script: str, args: List[str]) -> float:
+    log_path = os.path.join(root, f"{script}.log")
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        proc = subprocess.run([sys.executable, os.path.join(root, 'scripts', script), *args],
+                              cwd=root, stdout=log, stderr=subprocess.STDOUT)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        with open(log_path) as log:
+            print(log.read()[-2000:])
+        raise RuntimeError(f"{script} exited with {proc.returncode} (log: {log_path})")
+    return elapsed
+
+
+def bench(server: ReplayServer, season: int, teams: int, players: int, rpm: float,
+          workers: int, keep: bool) -> None:
+    if server.store is not None:
+        slugs = [slug for slug, _, _ in server.store.latest(season)]
+    else:
+        slugs = sorted(name.split('_')[0] for name in os.listdir(os.path.join(server.raw_dir, str(season)))
+                       if name.endswith('.html'))
+    slugs = slugs[:teams]
+    root = make_workspace(slugs)
+    print(f"Replaying {len(slugs)} teams for {season} from {server.base_url} (workspace {root})")
+    try:
+        if slugs:
+            server.take_log()
+            elapsed = run_script(root, '01_scrape_all_d1.py', [
+                '--season', str(season), '--rpm', str(rpm), '--workers', str(workers),
+                '--base-url', server.base_url,
+            ])
+            report('01', server.take_log(), elapsed)
+
+            elapsed = run_script(root, '01_scrape_all_d1.py', [
+                '--season', str(season), '--rpm', str(rpm), '--workers', str(workers),
+                '--base-url', server.base_url, '--refresh',
+            ])
+            report('01 refresh', server.take_log(), elapsed)
+
+        if players > 0:
+            # Real names from the scraped pages when there are any, so
+            # --from-team-pages has links to find
+            roster = team_page_players(os.path.join(root, 'ncaa-analytics', 'data_raw'), season)
+            roster = roster or [('bench', f"Bench Player {i:04d}") for i in range(players)]
+            db_path = os.path.join(root, 'dob_bench.db')
+            dob_cache = os.path.join(root, 'ncaa-analytics', 'cache', 'dob_cache.db')
+            dob_args = [
+                '--db-path', db_path, '--season', str(season),
+                '--rpm', str(rpm), '--workers', str(workers), '--base-url', server.base_url,
+            ]
+            for label, mode_args in (('11', []), ('11 pages', ['--from-team-pages'])):
+                make_dob_db(db_path, season, roster[:players])
+                if os.path.exists(dob_cache):
+                    os.remove(dob_cache)
+                server.take_log()
+                elapsed = run_script(root, '11_scrape_player_dobs_from_sportsref.py', dob_args + mode_args)
+                report(label, server.take_log(), elapsed)
+
+                # Second pass only has misses left, which the DOB cache already knows
+                elapsed = run_script(root, '11_scrape_player_dobs_from_sportsref.py', dob_args + mode_args)
+                report(label + ' rerun', server.take_log(), elapsed)
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Local replay server for the scrapers, and a scrape benchmark."
+    )
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--port", type=int, default=8765, help="serve: port to listen on.")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Mean injected latency per request (uniform 0.5x-1.5x).")
+    parser.add_argument("--p429", type=float, default=0.0,
+                        help="Probability that any request gets a 429.")
+    parser.add_argument("--p404", type=float, default=0.0,
+                        help="Fraction of URLs that always 404.")
+    parser.add_argument("--retry-after", type=int, default=1,
+                        help="Retry-After seconds sent with injected 429s.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--raw-store", action="store_true",
+                        help="Replay team pages from the raw store instead of data_raw/<year>.")
+    parser.add_argument("--season", type=int, default=2025, help="bench: season to replay.")
+    parser.add_argument("--teams", type=int, default=50, help="bench: team pages to scrape.")
+    parser.add_argument("--players", type=int, default=50, help="bench: DOB lookups to run.")
+    parser.add_argument("--rpm", type=float, default=6000.0,
+                        help="bench: --rpm passed to both scrapers.")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="bench: --workers passed to both scrapers.")
+    parser.add_argument("--keep", action="store_true",
+                        help="bench: keep the throwaway workspace (logs, queue, pages).")
+    args = parser.parse_args()
+
+    store = RawStore() if args.raw_store else None
+    server = start_server(
+        args.port if args.command == "serve" else 0,
+        store=store, latency_ms=args.latency_ms, p429=args.p429, p404=args.p404,
+        retry_after=args.retry_after, seed=args.seed,
+    )
+    try:
+        if args.command == "serve":
+            source = 'the raw store' if store is not None else RAW_DIR
+            print(f"Replaying {source} at {server.base_url} (Ctrl-C to stop)")
+            while True:
+                time.sleep(3600)
+        else:
+            bench(server, args.season, args.teams, args.players, args.rpm, args.workers, args.keep)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Durable job queue for the team-season scraper (01_scrape_all_d1.py).
+
+Every (slug, season) page is one row in a small SQLite file with its status,
+attempt count, last HTTP code and the earliest time it may be retried. The
+scraper drains the queue and records each outcome as soon as it arrives, so
+an interrupted crawl resumes exactly where it stopped and only the real gaps
+(429s, 5xx, network errors) are retried.
+"""
+import os
+import random
+import time
+from typing import List, Optional, Tuple
+
+from db import connect
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+JOBS_DB_PATH = os.path.join(PROJECT_ROOT, 'ncaa-analytics', 'cache', 'scrape_jobs.db')
+
+# pending -> done | missing | failed, with retry in between
+PENDING = 'pending'
+RETRY = 'retry'
+DONE = 'done'
+MISSING = 'missing'  # 404: team did not play D1 that season
+FAILED = 'failed'    # gave up after max attempts, or a non-retryable status
+
+MAX_BACKOFF = 3600.0
+
+
+class ScrapeJobQueue:
+    def __init__(self, path: str = JOBS_DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = connect(path, migrations=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scrape_jobs (
+                slug              TEXT NOT NULL,
+                season            INTEGER NOT NULL,
+                url               TEXT NOT NULL,
+                status            TEXT NOT NULL DEFAULT 'pending',
+                priority          INTEGER NOT NULL DEFAULT 0,
+                shuffle_key       REAL NOT NULL,
+                attempts          INTEGER NOT NULL DEFAULT 0,
+                last_http_code    INTEGER,
+                last_error        TEXT,
+                next_eligible_at  REAL NOT NULL DEFAULT 0,
+                updated_at        TEXT DEFAULT (datetime('now')),
+                PRIMARY KEY (slug, season)
+            );
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_scrape_jobs_claim "
+            "ON scrape_jobs (status, next_eligible_at);"
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def enqueue(self, jobs: List[Tuple[str, int, str]], priority: int = 0) -> int:
+        """
+        Adds (slug, season, url) jobs that are not queued yet. Existing rows
+        keep their state, so re-running never repeats finished work. The
+        shuffle key spreads requests across teams without losing resumability.
+        """
+        cur = self.conn.executemany(
+            """
+            INSERT OR IGNORE INTO scrape_jobs (slug, season, url, priority, shuffle_key)
+            VALUES (?, ?, ?, ?, ?);
+            """,
+            [(slug, season, url, priority, random.random()) for slug, season, url in jobs],
+        )
+        self.conn.commit()
+        return cur.rowcount
+
+    def mark_done(self, slug: str, season: int, http_code: Optional[int] = None) -> None:
+        self._set(slug, season, DONE, http_code, None, 0.0)
+
+    def reset(self, season: int, statuses: Tuple[str, ...]) -> int:
+        """Puts jobs of `season` in `statuses` back to pending (e.g. for a refresh)."""
+        placeholders = ", ".join("?" for _ in statuses)
+        cur = self.conn.execute(
+            f"""
+            UPDATE scrape_jobs
+            SET status = 'pending', attempts = 0, next_eligible_at = 0,
+                updated_at = datetime('now')
+            WHERE season = ? AND status IN ({placeholders});
+            """,
+            (season, *statuses),
+        )
+        self.conn.commit()
+        return cur.rowcount
+
+    def claim(self, seasons: List[int], limit: int) -> List[Tuple[str, int, str, int]]:
+        """
+        Next jobs that may run now, highest priority first. Nothing is locked:
+        a job stays pending until its outcome is recorded, so a crash simply
+        leaves it to be claimed again on the next run.
+        """
+        placeholders = ", ".join("?" for _ in seasons)
+        return self.conn.execute(
+            f"""
+            SELECT slug, season, url, attempts
+            FROM scrape_jobs
+            WHERE status IN ('pending', 'retry')
+              AND next_eligible_at <= ?
+              AND season IN ({placeholders})
+            ORDER BY priority DESC, attempts ASC, shuffle_key
+            LIMIT ?;
+            """,
+            (time.time(), *seasons, limit),
+        ).fetchall()
+
+    def next_eligible_in(self, seasons: List[int]) -> Optional[float]:
+        """Seconds until the next waiting retry becomes eligible, or None if nothing is left."""
+        placeholders = ", ".join("?" for _ in seasons)
+        row = self.conn.execute(
+            f"""
+            SELECT MIN(next_eligible_at) FROM scrape_jobs
+            WHERE status IN ('pending', 'retry') AND season IN ({placeholders});
+            """,
+            tuple(seasons),
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def record(self, slug: str, season: int, attempts: int, http_code: Optional[int],
+               error: Optional[str], max_attempts: int, retry_after: Optional[float] = None) -> str:
+        """
+        Stores the outcome of one fetch and returns the job's new status.
+        429/5xx/network errors are retried with exponential backoff (or the
+        server's Retry-After) until max_attempts; 404 is a permanent gap.
+        """
+        if http_code in (200, 304):
+            status, delay = DONE, 0.0
+        elif http_code == 404:
+            status, delay = MISSING, 0.0
+        elif http_code is None or http_code == 429 or http_code >= 500:
+            if attempts >= max_attempts:
+                status, delay = FAILED, 0.0
+            else:
+                status = RETRY
+                delay = retry_after if retry_after is not None else min(MAX_BACKOFF, 60.0 * 2 ** (attempts - 1))
+        else:
+            status, delay = FAILED, 0.0
+
+        self.conn.execute(
+            """
+            UPDATE scrape_jobs
+            SET status = ?, attempts = ?, last_http_code = ?, last_error = ?,
+                next_eligible_at = ?, updated_at = datetime('now')
+            WHERE slug = ? AND season = ?;
+            """,
+            (status, attempts, http_code, error, time.time() + delay, slug, season),
+        )
+        self.conn.commit()
+        return status
+
+    def _set(self, slug, season, status, http_code, error, next_eligible_at) -> None:
+        self.conn.execute(
+            """
+            UPDATE scrape_jobs
+            SET status = ?, last_http_code = COALESCE(?, last_http_code), last_error = ?,
+                next_eligible_at = ?, updated_at = datetime('now')
+            WHERE slug = ? AND season = ?;
+            """,
+            (status, http_code, error, next_eligible_at, slug, season),
+        )
+        self.conn.commit()
+
+    def summary(self, seasons: List[int]) -> List[Tuple[int, str, int]]:
+        placeholders = ", ".join("?" for _ in seasons)
+        return self.conn.execute(
+            f"""
+            SELECT season, status, COUNT(*) FROM scrape_jobs
+            WHERE season IN ({placeholders})
+            GROUP BY season, status ORDER BY season, status;
+            """,
+            tuple(seasons),
+        ).fetchall()
+
+    def failures(self, seasons: List[int]) -> List[Tuple[str, int, int, Optional[int], Optional[str]]]:
+        placeholders = ", ".join("?" for _ in seasons)
+        return self.conn.execute(
+            f"""
+            SELECT slug, season, attempts, last_http_code, last_error FROM scrape_jobs
+            WHERE status = 'failed' AND season IN ({placeholders})
+            ORDER BY season, slug;
+            """,
+            tuple(seasons),
+        ).fetchall()
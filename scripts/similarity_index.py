@@ -0,0 +1,198 @@
+"""
+Nearest-neighbour index over the similarity feature matrix.
+
+Holds the z-scored features as one contiguous float32 array and answers k-NN
+queries with a KD-tree (scipy's cKDTree) plus partial selection, optionally
+restricted to some seasons / positions and excluding given players. Without
+scipy it falls back to an exact brute-force scan with argpartition.
+
+Run directly to benchmark query latency on synthetic data:
+    python scripts/similarity_index.py --rows 25000 --rows 250000
+"""
+import argparse
+import time
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # optional; brute force gives the same answers, just slower at scale
+    cKDTree = None
+
+# Filters keeping less than this share of rows are answered by scanning the
+# matching rows; wider ones ask the tree for extra neighbours and drop misses.
+SCAN_FRACTION = 0.25
+# Rows per block when computing all-pairs neighbours by brute force
+CHUNK_SIZE = 256
+
+
+class SimilarityIndex:
+    def __init__(self, features, player_ids, seasons=None, positions=None,
+                 use_tree: Optional[bool] = None, leaf_size: int = 16):
+        self.X = np.ascontiguousarray(features, dtype=np.float32)
+        self.player_ids = np.asarray(player_ids)
+        self.seasons = np.asarray(seasons) if seasons is not None else None
+        self.positions = np.asarray(positions, dtype=object) if positions is not None else None
+        self.row_of = {pid: i for i, pid in enumerate(self.player_ids.tolist())}
+        self._filters = {}
+
+        if use_tree is None:
+            use_tree = cKDTree is not None
+        self.tree = cKDTree(self.X, leafsize=leaf_size) if use_tree and len(self.X) else None
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+    def vector(self, player_id) -> np.ndarray:
+        return self.X[self.row_of[player_id]]
+
+    def _filter(self, seasons, positions):
+        """(mask, rows) for a season/position filter, or (None, None) for no filter. Cached."""
+        key = (tuple(sorted(seasons)) if seasons is not None else None,
+               tuple(sorted(positions)) if positions is not None else None)
+        if key == (None, None):
+            return None, None
+        if key not in self._filters:
+            mask = np.ones(len(self), dtype=bool)
+            if seasons is not None:
+                mask &= np.isin(self.seasons, key[0])
+            if positions is not None:
+                mask &= np.isin(self.positions, key[1])
+            self._filters[key] = (mask, np.flatnonzero(mask))
+        return self._filters[key]
+
+    def query(self, vector, k: int = 4, seasons: Optional[Iterable] = None,
+              positions: Optional[Iterable] = None,
+              exclude: Optional[Iterable] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (player_ids, distances) of the k rows nearest to `vector`, nearest
+        first, among rows in `seasons` and `positions` (None = any) and not in
+        `exclude` (player_ids).
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        mask, rows = self._filter(seasons, positions)
+        excluded = [self.row_of[pid] for pid in (exclude or ()) if pid in self.row_of]
+
+        # Ask for enough extra rows to still have k after dropping the excluded ones
+        allowed = len(self) if rows is None else len(rows)
+        want = min(k + len(excluded), allowed)
+        if want <= 0:
+            return self.player_ids[:0], np.empty(0, dtype=np.float32)
+
+        if self.tree is None or (rows is not None and allowed < SCAN_FRACTION * len(self)):
+            idx, dist = self._scan(vector, want, rows)
+        else:
+            idx, dist = self._tree_query(vector, want, mask, allowed)
+        if excluded:
+            keep = ~np.isin(idx, excluded)
+            idx, dist = idx[keep], dist[keep]
+        return self.player_ids[idx[:k]], dist[:k]
+
+    def neighbors(self, player_id, k: int = 4, **filters) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest other players to `player_id` (which is always excluded)."""
+        exclude = set(filters.pop('exclude', None) or ()) | {player_id}
+        return self.query(self.vector(player_id), k, exclude=exclude, **filters)
+
+    def _scan(self, vector, k, rows=None):
+        X = self.X if rows is None else self.X[rows]
+        diff = X - vector
+        d2 = np.einsum('ij,ij->i', diff, diff)
+        part = np.argpartition(d2, k - 1)[:k] if k < len(d2) else np.arange(len(d2))
+        order = part[np.argsort(d2[part], kind='stable')]
+        idx = order if rows is None else rows[order]
+        return idx, np.sqrt(d2[order])
+
+    def _tree_query(self, vector, k, mask, allowed):
+        # Oversample in proportion to how much the filter removes, then widen if short
+        want = k if mask is None else min(len(self), int(np.ceil(k * len(self) / allowed)) + k)
+        while True:
+            dist, idx = self.tree.query(vector, k=want)
+            dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+            if mask is not None:
+                keep = mask[idx]
+                dist, idx = dist[keep], idx[keep]
+            if len(idx) >= k or want >= len(self):
+                return idx[:k], dist[:k].astype(np.float32)
+            want = min(len(self), want * 2)
+
+    def knn_all(self, k: int, chunk_size: int = CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (row indices, distances) of the k nearest other rows for every row,
+        shape (n, k), nearest first. Used to precompute the similarity table.
+        """
+        n = len(self)
+        k = min(k, n - 1)
+        if self.tree is not None:
+            dist, idx = self.tree.query(self.X, k=k + 1)
+            # Drop each row's own entry (not always first when rows are identical)
+            keep = idx != np.arange(n)[:, None]
+            no_self = keep.all(axis=1)
+            keep[no_self, -1] = False
+            return idx[keep].reshape(n, k), dist[keep].reshape(n, k)
+
+        X = self.X.astype(np.float64)
+        sq_norms = np.einsum('ij,ij->i', X, X)
+        neighbors = np.empty((n, k), dtype=np.int64)
+        distances = np.empty((n, k), dtype=np.float64)
+        for lo in range(0, n, chunk_size):
+            hi = min(lo + chunk_size, n)
+            # |a - b|^2 = |a|^2 + |b|^2 - 2ab for the whole block at once
+            d2 = sq_norms[lo:hi, None] + sq_norms[None, :] - 2.0 * (X[lo:hi] @ X.T)
+            np.maximum(d2, 0.0, out=d2)
+            d2[np.arange(hi - lo), np.arange(lo, hi)] = np.inf  # never match self
+
+            part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            part_d2 = np.take_along_axis(d2, part, axis=1)
+            order = np.argsort(part_d2, axis=1, kind='stable')
+            neighbors[lo:hi] = np.take_along_axis(part, order, axis=1)
+            distances[lo:hi] = np.sqrt(np.take_along_axis(part_d2, order, axis=1))
+        return neighbors, distances
+
+
+def benchmark(rows, queries=500, k=4, dims=8, seed=0):
+    """Single-query latency: tree vs brute force, with and without filters."""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((rows, dims))
+    ids = np.arange(rows)
+    seasons = rng.integers(2021, 2021 + max(1, rows // 5000), rows)
+    positions = rng.choice(['G', 'F', 'C'], rows)
+    targets = rng.choice(rows, queries, replace=False)
+
+    for label, use_tree in (("tree", True), ("scan", False)):
+        if use_tree and cKDTree is None:
+            print(f"  rows={rows:>8} {label}: scipy not installed")
+            continue
+        start = time.perf_counter()
+        index = SimilarityIndex(X, ids, seasons, positions, use_tree=use_tree)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for filt, kwargs in (("none", {}), ("season", {'seasons': [2021]}),
+                             ("pos", {'positions': ['G', 'F']})):
+            start = time.perf_counter()
+            for t in targets:
+                index.neighbors(ids[t], k, **kwargs)
+            per_query = (time.perf_counter() - start) / queries * 1000
+            print(f"  rows={rows:>8} {label} filter={filt:<6} build={build_ms:>8.1f} ms "
+                  f"query={per_query:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark similarity index query latency on synthetic data."
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        action="append",
+        help="Number of player-seasons. Repeatable. Defaults to 25k, 100k and 250k.",
+    )
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    for rows in args.rows or [25000, 100000, 250000]:
+        benchmark(rows, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""
+Synthetic D1-scale data, and an end-to-end benchmark of stages 02-12 and the
+dashboard's query paths built on it, so scaling can be measured without a
+multi-hour scrape.
+
+generate writes under --root: configs/d1_teams_master.json and one page per
+team and season in ncaa-analytics/data_raw/<year>/, shaped like a
+Sports-Reference team page (roster and per-game tables, the totals table and
+schedule hidden in comments). With --csv it writes the per-year
+intermediate CSVs 02_parse_stats_and_roster.py would produce instead. Scale
+1 is current D1: every team in configs/d1_teams_master.json x 5 seasons x
+13-17 players; larger scales add numbered copies of each team. Rosters carry
+over between seasons (classes advance, seniors leave, freshmen arrive) and
+the output only depends on --seed.
+
+bench generates each scale into a throwaway workspace and runs parse, load,
+analytics (views, similarity, snapshot), the global ID / bio chain and age
+features there, with birthdates filled in the way the DOB scraper would.
+It reads the timings the scripts record (instrument.py), times the
+dashboard's cold start, search and similar-player lookups, and prints each
+step's time, throughput and peak memory per scale. The growth column is how
+much the step's time grew over the previous scale relative to the data;
+'!' marks steps growing faster than the data.
+
+    python scripts/synthetic_data.py generate --root /tmp/d1x10 --scale 10
+    python scripts/synthetic_data.py bench --scales 1 10 100
+    python scripts/synthetic_data.py bench --scales 100 --seasons 1 --skip-parse
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from db import connect
+from intermediate_format import YEARS, intermediate_path
+from player_features import SNAPSHOT_PATH, Z_COLUMNS, data_version, read_snapshot
+from player_search import SearchIndex
+from replay_server import player_id, run_script, synthetic_dob
+from similarity_index import SimilarityIndex
+
+# --- PATHS ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+TEAMS_CONFIG = os.path.join(PROJECT_ROOT, 'configs', 'd1_teams_master.json')
+
+ROSTER_SIZE = (13, 17)
+TEAM_GAMES = (28, 35)
+CLASS_NEXT = {'FR': 'SO', 'SO': 'JR', 'JR': 'SR'}
+TRANSFER_RATE = 0.08
+POSITIONS = ['G', 'G', 'G', 'F', 'F', 'F', 'C']
+
+FIRST_NAMES = [
+    'Aaron', 'Adam', 'Andre', 'Anthony', 'Austin', 'Brandon', 'Caleb', 'Cameron', 'Chris',
+    'Cole', 'Darius', 'David', 'Devin', 'Dylan', 'Elijah', 'Ethan', 'Isaiah', 'Jabari',
+    'Jalen', 'Jamal', 'Jaylen', 'Jordan', 'Josh', 'Justin', 'Kam', 'Keegan', 'Kevin',
+    'Kobe', 'Lamar', 'Landon', 'Malik', 'Marcus', 'Mason', 'Miles', 'Nate', 'Noah',
+    'Omar', 'Owen', 'Quentin', 'Reggie', 'Ryan', 'Sam', 'Terrence', 'Trey', 'Tyler',
+    'Victor', 'Xavier', 'Zach', 'Zion', 'Luka', 'Mikel', 'Oumar', 'Nikola', 'Tomas',
+]
+LAST_NAMES = [
+    'Adams', 'Allen', 'Anderson', 'Baker', 'Banks', 'Bell', 'Brooks', 'Brown', 'Bryant',
+    'Carter', 'Clark', 'Coleman', 'Cooper', 'Davis', 'Diallo', 'Edwards', 'Evans', 'Fisher',
+    'Ford', 'Foster', 'Garcia', 'Gray', 'Green', 'Hall', 'Harris', 'Hayes', 'Hill',
+    'Holmes', 'Howard', 'Hughes', 'Jackson', 'James', 'Jenkins', 'Johnson', 'Jones',
+    'Kelly', 'King', 'Lee', 'Lewis', 'Martin', 'Miller', 'Mitchell', 'Moore', 'Morgan',
+    'Murphy', 'Nelson', 'Okafor', 'Parker', 'Perry', 'Phillips', 'Price', 'Reed',
+    'Richardson', 'Roberts', 'Robinson', 'Ross', 'Sanders', 'Scott', 'Simmons', 'Smith',
+    'Stewart', 'Sullivan', 'Taylor', 'Thomas', 'Thompson', 'Turner', 'Walker', 'Ward',
+    'Washington', 'Watson', 'White', 'Williams', 'Wilson', 'Wright', 'Young', 'Petrovic',
+]
+TOWNS = ['Atlanta, GA', 'Chicago, IL', 'Dallas, TX', 'Detroit, MI', 'Houston, TX',
+         'Los Angeles, CA', 'Memphis, TN', 'Newark, NJ', 'Raleigh, NC', 'Seattle, WA',
+         'Toronto, Canada', 'Lagos, Nigeria', 'Belgrade, Serbia', 'Melbourne, Australia']
+
+PER_GAME_HEADERS = ['Rk', 'Player', 'Pos', 'G', 'GS', 'MP', 'FG', 'FGA', 'FG%', '3P', '3PA',
+                    '3P%', '2P', '2PA', '2P%', 'eFG%', 'FT', 'FTA', 'FT%', 'ORB', 'DRB',
+                    'TRB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'Awards']
+ROSTER_HEADERS = ['Player', '#', 'Class', 'Pos', 'Height', 'Weight', 'Hometown', 'High School']
+# Counting stats, scaled by games for the hidden totals table
+COUNTING = ['MP', 'FG', 'FGA', '3P', '3PA', '2P', '2PA', 'FT', 'FTA', 'ORB', 'DRB', 'TRB',
+            'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+
+
+@dataclass
+class Player:
+    name: str
+    number: int
+    pos: str
+    class_year: str
+    height: int  # inches
+    weight: int
+    hometown: str
+    skill: float  # 0-1; drives minutes, usage and efficiency
+    three_rate: float  # share of shots from three
+
+
+def base_teams() -> List[dict]:
+    if os.path.exists(TEAMS_CONFIG):
+        with open(TEAMS_CONFIG) as f:
+            teams = json.load(f)
+        if teams:
+            return teams
+    return [{'slug': f'team-{i:03d}', 'name': f'Team {i:03d}'} for i in range(1, 365)]
+
+
+def make_teams(scale: int) -> List[dict]:
+    """scale x the D1 team list; copy k of a team is '<slug>-<k>' / '<name> <k>'."""
+    teams = base_teams()
+    out = list(teams)
+    for k in range(2, scale + 1):
+        out.extend({'slug': f"{t['slug']}-{k}", 'name': f"{t['name']} {k}"} for t in teams)
+    return out
+
+
+def new_player(rng: random.Random, taken: set, class_year: str) -> Player:
+    while True:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if name not in taken:
+            break
+        # Common pairs repeat on big rosters; a suffix keeps names unique per team
+        name += f" {rng.choice(['Jr.', 'II', 'III'])}"
+        if name not in taken:
+            break
+    taken.add(name)
+    pos = rng.choice(POSITIONS)
+    height = {'G': 74, 'F': 79, 'C': 83}[pos] + rng.randint(-3, 3)
+    number = rng.randint(0, 55)
+    return Player(
+        name=name, number=number, pos=pos, class_year=class_year, height=height,
+        weight=int(height * 2.9 - 25 + rng.gauss(0, 12)),
+        hometown=rng.choice(TOWNS), skill=rng.betavariate(2, 3),
+        three_rate={'G': 0.45, 'F': 0.3, 'C': 0.08}[pos] * rng.uniform(0.5, 1.5),
+    )
+
+
+def first_roster(rng: random.Random) -> List[Player]:
+    taken = set()
+    return [new_player(rng, taken, rng.choice(['FR', 'SO', 'JR', 'SR']))
+            for _ in range(rng.randint(*ROSTER_SIZE))]
+
+
+def next_roster(rng: random.Random, roster: List[Player]) -> List[Player]:
+    """Next season: seniors leave, some transfer out, the rest advance, freshmen fill in."""
+    kept = []
+    for p in roster:
+        if p.class_year == 'SR' or rng.random() < TRANSFER_RATE:
+            continue
+        p.class_year = CLASS_NEXT[p.class_year]
+        p.skill = min(0.99, p.skill + rng.uniform(0.0, 0.08))
+        kept.append(p)
+    taken = {p.name for p in kept}
+    target = rng.randint(*ROSTER_SIZE)
+    while len(kept) < target:
+        kept.append(new_player(rng, taken, 'FR'))
+    return kept
+
+
+def _pct(made: float, att: float) -> str:
+    return '' if att <= 0 else f"{made / att:.3f}".lstrip('0')
+
+
+def per_game_row(rng: random.Random, p: Player, team_games: int) -> Dict[str, object]:
+    """One per-game line with the internal consistency SR data has (PTS = 2*2P + 3*3P + FT)."""
+    g = max(1, min(team_games, int(team_games * rng.uniform(0.3 + 0.7 * p.skill, 1.05))))
+    gs = int(g * max(0.0, min(1.0, (p.skill - 0.35) * 2.5 + rng.uniform(-0.1, 0.1))))
+    mp = round(max(1.0, 4 + 30 * p.skill + rng.gauss(0, 3)), 1)
+    fga = round(mp * (0.22 + 0.2 * p.skill) * rng.uniform(0.8, 1.2), 1)
+    three_pa = round(fga * p.three_rate, 1)
+    two_pa = round(fga - three_pa, 1)
+    three_p = round(three_pa * min(0.48, max(0.0, rng.gauss(0.27 + 0.12 * p.skill, 0.04))), 1)
+    two_p = round(two_pa * min(0.7, max(0.2, rng.gauss(0.44 + 0.12 * p.skill, 0.04))), 1)
+    fta = round(fga * rng.uniform(0.15, 0.45), 1)
+    ft = round(fta * min(0.95, max(0.3, rng.gauss(0.62 + 0.2 * p.skill, 0.06))), 1)
+    fg = round(two_p + three_p, 1)
+    big = {'G': 0.6, 'F': 1.0, 'C': 1.5}[p.pos]
+    orb = round(mp * 0.03 * big * rng.uniform(0.6, 1.4), 1)
+    drb = round(mp * 0.09 * big * rng.uniform(0.7, 1.3), 1)
+    return {
+        'G': g, 'GS': gs, 'MP': mp, 'FG': fg, 'FGA': fga, 'FG%': _pct(fg, fga),
+        '3P': three_p, '3PA': three_pa, '3P%': _pct(three_p, three_pa),
+        '2P': two_p, '2PA': two_pa, '2P%': _pct(two_p, two_pa),
+        'eFG%': _pct(fg + 0.5 * three_p, fga), 'FT': ft, 'FTA': fta, 'FT%': _pct(ft, fta),
+        'ORB': orb, 'DRB': drb, 'TRB': round(orb + drb, 1),
+        'AST': round(mp * 0.1 * (2.2 - big) * rng.uniform(0.5, 1.5), 1),
+        'STL': round(mp * 0.03 * rng.uniform(0.5, 1.5), 1),
+        'BLK': round(mp * 0.015 * big * big * rng.uniform(0.3, 1.7), 1),
+        'TOV': round(mp * 0.05 * rng.uniform(0.6, 1.4), 1),
+        'PF': round(mp * 0.07 * rng.uniform(0.6, 1.4), 1),
+        'PTS': round(2 * two_p + 3 * three_p + ft, 1),
+    }
+
+
+def roster_row(p: Player) -> Dict[str, object]:
+    return {
+        'Player': p.name, '#': p.number, 'Class': p.class_year, 'Pos': p.pos,
+        'Height': f"{p.height // 12}-{p.height % 12}", 'Weight': p.weight,
+        'Hometown': p.hometown, 'High School': f"{p.hometown.split(',')[0]} Prep",
+    }
+
+
+def _cells(values, link: Optional[str] = None) -> str:
+    return ''.join(f'<td><a href="{link}">{v}</a></td>' if link and i == 0 else f'<td>{v}</td>'
+                   for i, v in enumerate(values))
+
+
+def _table(table_id: str, headers: List[str], rows: List[str], foot: str = '') -> str:
+    head = ''.join(f'<th scope="col">{h}</th>' for h in headers)
+    return (f'<table class="sortable stats_table" id="{table_id}"><thead><tr>{head}</tr></thead>'
+            f'<tbody>{"".join(rows)}</tbody>{foot}</table>')
+
+
+def team_page(team: dict, year: int, roster: List[Player], lines: List[dict],
+              team_games: int, rng: random.Random) -> str:
+    links = [f"/cbb/players/{player_id(p.name)}.html" for p in roster]
+    roster_rows = [f'<tr>{_cells([r[h] for h in ROSTER_HEADERS], link)}</tr>'
+                   for r, link in zip((roster_row(p) for p in roster), links)]
+    order = sorted(range(len(roster)), key=lambda i: -lines[i]['MP'])
+    stat_headers = PER_GAME_HEADERS[3:-1]
+    per_game_rows = [f'<tr><th scope="row">{rank}</th>'
+                     f'{_cells([roster[i].name, roster[i].pos] + [lines[i][h] for h in stat_headers] + [""], links[i])}</tr>'
+                     for rank, i in enumerate(order, 1)]
+    totals_rows = [f'<tr><th scope="row">{rank}</th>'
+                   f'{_cells([roster[i].name, roster[i].pos, lines[i]["G"], lines[i]["GS"]] + [round(lines[i][h] * lines[i]["G"]) for h in COUNTING], links[i])}</tr>'
+                   for rank, i in enumerate(order, 1)]
+    foot = ('<tfoot><tr><th></th><td>Team Totals</td><td></td>'
+            + '<td></td>' * (len(PER_GAME_HEADERS) - 3) + '</tr></tfoot>')
+    schedule = [f'<tr><th scope="row">{n}</th><td>{year - 1 if n < 10 else year}-{1 + n % 12:02d}-{1 + n % 28:02d}</td>'
+                f'<td>{"@" if rng.random() < 0.45 else ""}</td><td>Opponent {rng.randint(1, 364)}</td>'
+                f'<td>{"W" if rng.random() < 0.5 else "L"}</td><td>{rng.randint(55, 95)}</td>'
+                f'<td>{rng.randint(55, 95)}</td></tr>' for n in range(1, team_games + 1)]
+    name = team['name']
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        f'<title>{year - 1}-{str(year)[2:]} {name} Men\'s Roster and Stats | College Basketball at Sports-Reference.com</title>'
+        f'</head><body><div id="wrap"><div id="header"><nav>{"".join(f"<a href=/cbb/{i}.html>Link {i}</a>" for i in range(40))}</nav></div>'
+        f'<div id="info"><h1><span>{year - 1}-{str(year)[2:]}</span> <span>{name}</span> Men\'s Roster and Stats</h1></div>'
+        f'<div id="all_roster" class="table_wrapper"><h2>Roster</h2>'
+        f'{_table("roster", ROSTER_HEADERS, roster_rows)}</div>'
+        f'<div id="all_players_per_game" class="table_wrapper"><h2>Per Game</h2>'
+        f'{_table("players_per_game", PER_GAME_HEADERS, per_game_rows, foot)}</div>'
+        f'<div id="all_players_totals" class="table_wrapper"><h2>Totals</h2><div class="placeholder"></div><!--\n'
+        f'{_table("players_totals", PER_GAME_HEADERS[:5] + COUNTING, totals_rows)}\n--></div>'
+        f'<div id="all_schedule" class="table_wrapper"><h2>Schedule</h2><div class="placeholder"></div><!--\n'
+        f'{_table("schedule", ["G", "Date", "", "Opponent", "W/L", "Tm", "Opp"], schedule)}\n--></div>'
+        f'<div id="footer">{"".join(f"<p>Footer line {i}</p>" for i in range(20))}</div>'
+        f'</div></body></html>'
+    )
+
+
+def generate(root: str, scale: int = 1, seasons: List[int] = YEARS, seed: int = 0,
+             csv: bool = False) -> Tuple[int, int]:
+    """
+    Writes the team config and one page (or, with csv=True, intermediate
+    rows) per team and season under `root`. Returns (team-seasons, player-seasons).
+    """
+    teams = make_teams(scale)
+    os.makedirs(os.path.join(root, 'configs'), exist_ok=True)
+    with open(os.path.join(root, 'configs', 'd1_teams_master.json'), 'w') as f:
+        json.dump(teams, f, indent=2)
+
+    # Season by season so only one season's rows are in memory; each team
+    # keeps its own generator and roster between seasons
+    rngs = [random.Random(f"{seed}:{index}") for index in range(len(teams))]
+    rosters = [first_roster(rng) for rng in rngs]
+    pages = players = 0
+    for n, year in enumerate(seasons):
+        raw_dir = os.path.join(root, 'ncaa-analytics', 'data_raw', str(year))
+        os.makedirs(raw_dir, exist_ok=True)
+        stat_rows, roster_rows = [], []
+        for index, (team, rng) in enumerate(zip(teams, rngs)):
+            if n:
+                rosters[index] = next_roster(rng, rosters[index])
+            roster = rosters[index]
+            team_games = rng.randint(*TEAM_GAMES)
+            lines = [per_game_row(rng, p, team_games) for p in roster]
+            if csv:
+                meta = {'team_slug': team['slug'], 'season': year}
+                for rank, (p, line) in enumerate(zip(roster, lines), 1):
+                    stat_rows.append({**meta, 'Rk': rank, 'Player': p.name, 'Pos': p.pos,
+                                      **line, 'Awards': None})
+                    roster_rows.append({**meta, **roster_row(p)})
+            else:
+                html = team_page(team, year, roster, lines, team_games, rng)
+                with open(os.path.join(raw_dir, f"{team['slug']}_{year}.html"), 'w',
+                          encoding='utf-8') as f:
+                    f.write(html)
+            pages += 1
+            players += len(roster)
+
+        if csv:
+            for kind, rows in (('per_game', stat_rows), ('rosters', roster_rows)):
+                path = os.path.join(root, os.path.relpath(intermediate_path(year, kind, 'csv'),
+                                                          PROJECT_ROOT))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                pd.DataFrame(rows).to_csv(path, index=False)
+    return pages, players
+
+
+# --- BENCHMARK ---
+
+# (step, span recorded by the scripts, row count column of that span or of a child span)
+BENCH_STEPS = [
+    ('parse', 'parse', ('parse.year', 'rows_out')),
+    ('load', 'load', ('load.season', 'rows_out')),
+    ('views', 'analytics.views', None),
+    ('similarity', 'analytics.similarity', ('analytics.similarity', 'rows_in')),
+    ('snapshot', 'analytics.snapshot', ('analytics.snapshot', 'rows_out')),
+    ('global ids', 'global_ids', None),
+    ('bio seed', 'seed_bio', ('seed_bio', 'rows_out')),
+    ('ages', 'ages', ('ages.season', 'rows_out')),
+]
+
+
+def make_workspace(scale: int) -> str:
+    """Throwaway project copy (scripts and schema) for one scale."""
+    root = tempfile.mkdtemp(prefix=f'd1_bench_x{scale}_')
+    for name in ('scripts', 'schema'):
+        shutil.copytree(os.path.join(PROJECT_ROOT, name), os.path.join(root, name),
+                        ignore=shutil.ignore_patterns('__pycache__'))
+    return root
+
+
+def fill_birthdates(db_path: str) -> int:
+    """Stands in for 11_scrape_player_dobs_from_sportsref.py: the DOBs replay_server serves."""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute("SELECT global_player_id, full_name FROM dim_player_bio;").fetchall()
+        with conn:
+            conn.executemany("UPDATE dim_player_bio SET birthdate = ? WHERE global_player_id = ?;",
+                             [(synthetic_dob(name), gid) for gid, name in rows])
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def span_totals(root: str) -> Dict[str, dict]:
+    """Per span: summed wall/cpu seconds and rows, max peak RSS, from the workspace's runs DB."""
+    conn = connect(os.path.join(root, 'ncaa-analytics', 'cache', 'pipeline_runs.db'), readonly=True)
+    try:
+        keys = ('wall_s', 'cpu_s', 'peak_rss_mb', 'rows_in', 'rows_out')
+        return {row[0]: dict(zip(keys, row[1:])) for row in conn.execute(
+            "SELECT span, SUM(wall_s), SUM(cpu_s), MAX(peak_rss_mb), SUM(rows_in), SUM(rows_out) "
+            "FROM pipeline_runs GROUP BY span;")}
+    finally:
+        conn.close()
+
+
+def _median_ms(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def bench_dashboard(root: str, repeat: int = 20, seed: int = 0) -> Dict[str, Tuple[float, int]]:
+    """Median ms (and rows) of the dashboard's data paths against the workspace DB."""
+    db_path = os.path.join(root, 'ncaa-analytics', 'db', 'ncaa_d1_master.db')
+    snapshot = os.path.join(root, os.path.relpath(SNAPSHOT_PATH, PROJECT_ROOT))
+    rng = random.Random(seed)
+    conn = connect(db_path, readonly=True)
+    try:
+        source = data_version(conn)
+        df = read_snapshot(source, snapshot)
+        if df is None:
+            print("  (no dashboard snapshot; pyarrow missing?) skipping dashboard timings")
+            return {}
+        results = {'cold start': (_median_ms(lambda: read_snapshot(source, snapshot), 5), len(df))}
+        season = int(df['season'].max())
+
+        start = time.perf_counter()
+        search = SearchIndex(df['full_name'].tolist(),
+                             zip(df['team_name'].tolist(), df['team_slug'].tolist()),
+                             df['season'].to_numpy())
+        results['search build'] = ((time.perf_counter() - start) * 1000, len(df))
+        terms = [rng.choice(FIRST_NAMES)[:3] + ' ' + rng.choice(LAST_NAMES)[:2] for _ in range(repeat)]
+        it = iter(terms * 2)
+        results['search query'] = (_median_ms(lambda: search.query(next(it), seasons=[season]),
+                                              repeat), len(df))
+
+        start = time.perf_counter()
+        index = SimilarityIndex(df[Z_COLUMNS].to_numpy(), df['player_id'].to_numpy(),
+                                df['season'].to_numpy(), df['pos'].to_numpy())
+        results['knn build'] = ((time.perf_counter() - start) * 1000, len(df))
+        z = df[Z_COLUMNS].to_numpy()
+        picks = [rng.randrange(len(df)) for _ in range(repeat)]
+        it = iter(picks * 2)
+
+        def knn():
+            row = next(it)
+            index.query(z[row], k=4, seasons=[season], positions=[df['pos'].iat[row]],
+                        exclude=[df['player_id'].iat[row]])
+        results['knn query'] = (_median_ms(knn, repeat), len(df))
+
+        ids = iter([int(df['player_id'].iat[row]) for row in picks] * 2)
+        results['similar lookup'] = (_median_ms(lambda: conn.execute(
+            """
+            SELECT v.player_id, v.full_name, v.team_slug, v.season, s.distance
+            FROM fact_player_similarity s
+            JOIN player_profiles v ON v.player_id = s.neighbor_id
+            WHERE s.player_id = ? ORDER BY s.rank LIMIT 4;
+            """, (next(ids),)).fetchall(), repeat), len(df))
+        results['leaders'] = (_median_ms(lambda: conn.execute(
+            "SELECT * FROM player_profiles WHERE season = ? AND g >= 6 ORDER BY pts DESC LIMIT 5;",
+            (season,)).fetchall(), repeat), len(df))
+        return results
+    finally:
+        conn.close()
+
+
+def bench_scale(scale: int, seasons: List[int], workers: int, skip_parse: bool, seed: int,
+                keep: bool) -> Dict[str, dict]:
+    root = make_workspace(scale)
+    print(f"\n=== {scale}x D1 (workspace {root}) ===")
+    try:
+        start = time.perf_counter()
+        pages, players = generate(root, scale, seasons, seed, csv=skip_parse)
+        print(f"  generated {pages} team-seasons, {players} player-seasons "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        season_args = [arg for year in seasons for arg in ('--season', str(year))]
+        steps = [] if skip_parse else [
+            ('02_parse_stats_and_roster.py', season_args + ['--workers', str(workers), '--full'])]
+        steps += [
+            ('03_load_sqlite_master.py', season_args),
+            ('04_create_analytics_views.py', ['--season', str(seasons[-1])]),
+            ('05_add_global_player_ids.py', []),
+            ('06_apply_nba_schema.py', []),
+            ('07_bootstrap_dim_player_global_from_ncaa.py', []),
+            ('08_apply_player_bio_schema.py', []),
+            ('09_seed_player_bio_from_players.py', []),
+        ]
+        for script, args in steps:
+            elapsed = run_script(root, script, args)
+            print(f"  {script:<46} {elapsed:8.1f}s")
+        fill_birthdates(os.path.join(root, 'ncaa-analytics', 'db', 'ncaa_d1_master.db'))
+        elapsed = run_script(root, '12_compute_age_features.py', [])
+        print(f"  {'12_compute_age_features.py':<46} {elapsed:8.1f}s")
+
+        spans = span_totals(root)
+        results = {}
+        for step, name, rows_from in BENCH_STEPS:
+            if name not in spans:
+                continue
+            rows = spans.get(rows_from[0], {}).get(rows_from[1]) if rows_from else None
+            results[step] = {**spans[name], 'rows': rows}
+        for step, (ms, rows) in bench_dashboard(root, seed=seed).items():
+            results[f"app: {step}"] = {'wall_s': ms / 1000, 'rows': rows, 'peak_rss_mb': None}
+        results['_players'] = players
+        return results
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def report(results: Dict[int, Dict[str, dict]]) -> None:
+    scales = sorted(results)
+    steps = list(dict.fromkeys(step for scale in scales for step in results[scale]
+                               if not step.startswith('_')))
+    print(f"\n{'step':<20}" + ''.join(f"{f'{scale}x':>38}" for scale in scales))
+    print(f"{'':<20}" + f"{'time':>11}{'rows/s':>11}{'peak MB':>9}{'growth':>7}" * len(scales))
+    for step in steps:
+        line = f"{step:<20}"
+        prev = None
+        for scale in scales:
+            r = results[scale].get(step)
+            if r is None:
+                line += f"{'-':>38}"
+                prev = None
+                continue
+            wall = r['wall_s']
+            shown = f"{wall * 1000:.2f}ms" if step.startswith('app: ') else f"{wall:.2f}s"
+            rate = f"{r['rows'] / wall:,.0f}" if r.get('rows') and not step.startswith('app: ') else '-'
+            peak = f"{r['peak_rss_mb']:.0f}" if r.get('peak_rss_mb') else '-'
+            growth = ''
+            # Sub-millisecond timings are too noisy to compare
+            if prev is not None and prev[1] >= 0.001:
+                # Time growth relative to data growth; 1.0 = linear
+                ratio = (wall / prev[1]) / (results[scale]['_players'] / prev[0])
+                growth = f"{ratio:.1f}" + ('!' if ratio > 1.5 else ' ')
+            line += f"{shown:>11}{rate:>11}{peak:>9}{growth:>7}"
+            prev = (results[scale]['_players'], wall)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic D1-scale pages/CSVs, or benchmark stages 02-12 on them."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_gen = sub.add_parser("generate", help="Write synthetic data under --root.")
+    p_gen.add_argument("--root", required=True,
+                       help="Project-shaped directory to write into (configs/, ncaa-analytics/).")
+    p_bench = sub.add_parser("bench", help="Time the pipeline and dashboard paths per scale.")
+    p_bench.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                         help="Multiples of current D1 size.")
+    p_bench.add_argument("--workers", type=int, default=0,
+                         help="Parser processes (0 = one per CPU).")
+    p_bench.add_argument("--skip-parse", action="store_true",
+                         help="Generate intermediate CSVs and start at the loader.")
+    p_bench.add_argument("--keep", action="store_true", help="Keep the workspaces.")
+    for p in (p_gen, p_bench):
+        p.add_argument("--seasons", type=int, default=len(YEARS),
+                       help=f"Number of seasons, ending {YEARS[-1]}.")
+        p.add_argument("--seed", type=int, default=0)
+    p_gen.add_argument("--scale", type=int, default=1, help="Multiple of current D1 size.")
+    p_gen.add_argument("--csv", action="store_true",
+                       help="Write the intermediate CSVs instead of HTML pages.")
+    args = parser.parse_args()
+
+    seasons = list(range(YEARS[-1] - args.seasons + 1, YEARS[-1] + 1))
+    if args.command == "generate":
+        if os.path.abspath(args.root) == PROJECT_ROOT:
+            raise SystemExit("[ERROR] Refusing to write synthetic data into the project itself.")
+        start = time.perf_counter()
+        pages, players = generate(args.root, args.scale, seasons, args.seed, args.csv)
+        print(f"Wrote {pages} team-seasons ({players} player-seasons) under {args.root} "
+              f"in {time.perf_counter() - start:.1f}s.")
+        return
+
+    results = {}
+    for scale in args.scales:
+        results[scale] = bench_scale(scale, seasons, args.workers, args.skip_parse,
+                                     args.seed, args.keep)
+        report(results)
+
+
+if __name__ == "__main__":
+    main()